@@ -0,0 +1,73 @@
+import asyncio
+import json
+import re
+import time
+import zlib
+from typing import Any, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from scoring import estimate_tokens
+
+# Numbered job of the batch relevance prompt
+BATCH_JOB_PATTERN = re.compile(r'^\s*\[(\d+)\]\s*\n\s*Title: (.*)$', re.MULTILINE)
+# Title of the single-job relevance prompt
+TITLE_PATTERN = re.compile(r'^\s*Title: (.*)$', re.MULTILINE)
+
+
+def fake_score(title: str) -> int:
+    """Deterministic relevance score of a job title"""
+    return zlib.crc32(title.strip().encode("utf-8")) % 11
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model stub with a fixed latency and deterministic answers"""
+
+    latency: float = 0.2                                                        # Seconds every call takes
+    calls: int = 0
+    prompt_tokens: int = 0                                                      # Estimated tokens of all prompts
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _answer(self, prompt: str) -> str:
+        batch = BATCH_JOB_PATTERN.findall(prompt)
+        if batch:
+            return json.dumps(
+                [{"id": int(number), "relevance": fake_score(title), "reason": "Benchmark answer"} for number, title in batch]
+            )
+        title = TITLE_PATTERN.search(prompt)
+        if title:
+            return f"Relevance: {fake_score(title.group(1))}\nReason: Benchmark answer"
+        return "Python, Django, Telegram"                                      # Skills extraction
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        self.calls += 1
+        self.prompt_tokens += estimate_tokens(prompt)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(prompt)))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+
+class RecordingBot:
+    """Bot stand-in that records sent messages instead of calling Telegram"""
+
+    def __init__(self, token: str = "", **kwargs: Any) -> None:
+        self.token = token
+        self.sent: List[Tuple[float, int, str]] = []                            # (monotonic time, chat ID, text)
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any) -> None:
+        self.sent.append((time.monotonic(), chat_id, text))
+
+    def reset(self) -> None:
+        self.sent.clear()
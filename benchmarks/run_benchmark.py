@@ -0,0 +1,399 @@
+"""Offline benchmark of the scrape -> score -> notify path.
+
+Recorded listing pages are served from a local HTTP server, the model is
+replaced by a stub with a fixed latency and the bot by a recording fake,
+so no marketplace, model provider or Telegram is contacted.
+
+    python benchmarks/run_benchmark.py --sources 3 --latency 0.2 --json result.json
+"""
+import argparse
+import asyncio
+import copy
+import functools
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import psutil
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeChatModel, RecordingBot                        # noqa: E402
+from lazy import Lazy                                                           # noqa: E402
+
+# Listing with no jobs, served after the last recorded page
+EMPTY_PAGE = "<html><body><div class=\"b-page__lenta\"></div></body></html>"
+
+# Per-minute quota used when the model is not limited
+NO_LIMIT = 10 ** 9
+
+BENCH_USER_ID = 1
+BENCH_SKILLS = ["Python", "Django", "Telegram", "parsing"]
+
+
+def load_fixtures() -> List[str]:
+    """Recorded listing pages, page 1 first"""
+    paths = sorted(glob.glob(os.path.join(FIXTURES, "listing_page_*.html")))
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            pages.append(file.read())
+    return pages
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB"""
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024      # KB on Linux
+    except ImportError:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 1024 / 1024
+
+
+class StageTimer:
+    """Busy time and call count of wrapped functions, by stage name"""
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def wrap(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed_async(*args: Any, **kwargs: Any) -> Any:
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.add(name, time.perf_counter() - started)
+            return timed_async
+
+        @functools.wraps(func)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - started)
+        return timed
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {"seconds": round(total, 4), "calls": self.counts[name]}
+            for name, total in self.totals.items()
+        }
+
+
+async def start_server(pages: List[str], hosts: List[str], port: int) -> web.AppRunner:
+    """Serve the recorded pages at /projects/?page=N on every host"""
+    async def listing(request: web.Request) -> web.Response:
+        page = int(request.query.get("page", "1"))
+        body = pages[page - 1] if 1 <= page <= len(pages) else EMPTY_PAGE
+        return web.Response(text=body, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/projects/", listing)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    for host in hosts:
+        await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+class Benchmark:
+    """Runs the bot functions of main.py against the fixtures and fakes"""
+
+    def __init__(self, args: argparse.Namespace, workdir: str) -> None:
+        self.args = args
+        self.workdir = workdir
+        self.pages = load_fixtures()
+        self.hosts = [f"127.0.0.{number}" for number in range(1, args.sources + 1)]   # One domain per source
+
+        os.chdir(workdir)                                                       # bot.log and bot.db go to the work directory
+        import main
+        self.main = main
+        self.llm = FakeChatModel(latency=args.latency)
+        self.bot = RecordingBot()
+
+        main.SCRAPE_PAGE_DELAY = (args.page_delay, args.page_delay)
+        main.FREELANCE_SOURCES.clear()
+        template = {
+            "selector": "div.b-post",
+            "title_selector": "a.b-post__link",
+            "description_selector": "div.b-post__body",
+            "price_selector": "div.b-post__price",
+            "date_selector": "div.b-post__foot",
+            "fetch_mode": "http",
+            "max_pages": len(self.pages) + 1,
+        }
+        for host in self.hosts:
+            main.FREELANCE_SOURCES[host] = dict(template, name=host, url=f"http://{host}:{args.port}/projects/")
+
+        # The chains of main.py are created on first use, with the stub model
+        main.llm = Lazy(lambda: self.llm)
+        main.bot = Lazy(lambda: self.bot)
+
+        # Busy time of the stages inside a search
+        self.timer = StageTimer()
+        main.extract_jobs = self.timer.wrap("extract", main.extract_jobs)
+        main.crawl_deeper = self.timer.wrap("crawl_check", main.crawl_deeper)
+        main.select_new_jobs = self.timer.wrap("prescore", main.select_new_jobs)
+        main.score_batch = self.timer.wrap("model", main.score_batch)
+        main.deliver_result = self.timer.wrap("deliver", main.deliver_result)
+
+    async def reset(self, name: str) -> None:
+        """Fresh stores, caches and counters, so stages don't share results"""
+        main = self.main
+        await main.source_job_cache.close()
+        await main.http_fetcher.close()
+        if main.job_store.created:
+            main.job_store.get().close()
+        if main.relevance_cache.created:
+            main.relevance_cache.get().close()
+
+        job_store = main.JobStore(os.path.join(self.workdir, f"{name}.db"))
+        relevance_cache = main.RelevanceCache(main.RELEVANCE_CACHE_SIZE, main.RELEVANCE_CACHE_TTL, None)
+        main.job_store = Lazy(lambda: job_store)
+        main.relevance_cache = Lazy(lambda: relevance_cache)
+        main.source_job_cache = main.SourceJobCache(main.SOURCE_CACHE_TTL)
+        main.http_fetcher = main.HttpFetcher(main.USER_AGENT)
+        main.http_fetcher.fetch = self.timer.wrap("fetch", main.http_fetcher.fetch)
+        main.model_client = main.ModelClient(
+            main.MODEL_MAX_CONCURRENCY,
+            self.args.model_rpm or NO_LIMIT,
+            self.args.model_tpm or NO_LIMIT,
+            timeout=main.MODEL_TIMEOUT
+        )
+        self.bot.reset()
+        queue = main.DeliveryQueue(
+            self.bot,
+            messages_per_second=main.TELEGRAM_MESSAGES_PER_SECOND,
+            chat_interval=self.args.chat_interval
+        )
+        main.delivery_queue = Lazy(lambda: queue)
+        main.user_settings.clear()
+        main.duplicate_indexes.clear()
+        main.user_settings[BENCH_USER_ID] = {
+            "skills": BENCH_SKILLS,
+            "min_price": self.args.min_price,
+            "sources": list(main.FREELANCE_SOURCES),
+            "notification_interval": 60,
+            "task_running": False,
+            "chat_id": BENCH_USER_ID,
+            "last_jobs": set(),
+        }
+        self.llm.calls = 0
+        self.llm.prompt_tokens = 0
+        self.duplicates_before = main.JOBS_FILTERED.value(reason="duplicate")
+        self.timer.totals.clear()
+        self.timer.counts.clear()
+
+    def model_report(self, scored: int) -> Dict[str, Any]:
+        return {
+            "model_calls": self.llm.calls,
+            "model_calls_per_job": round(self.llm.calls / scored, 3) if scored else 0.0,
+            "prompt_tokens": self.llm.prompt_tokens,
+            "prompt_tokens_per_job": round(self.llm.prompt_tokens / scored, 1) if scored else 0.0,
+        }
+
+    def bench_extract(self) -> Dict[str, Any]:
+        """In-process parsing of the recorded pages"""
+        source_info = next(iter(self.main.FREELANCE_SOURCES.values()))
+        page_url = source_info["url"]
+        jobs = 0
+        started = time.perf_counter()
+        for _ in range(self.args.repeat):
+            for page, page_html in enumerate(self.pages, 1):
+                jobs += len(self.main.extract_jobs(page_html, page_url, source_info, page, 0))
+        elapsed = time.perf_counter() - started
+        return {
+            "seconds": round(elapsed, 4),
+            "pages": self.args.repeat * len(self.pages),
+            "jobs": jobs,
+            "jobs_per_sec": round(jobs / elapsed, 1),
+        }
+
+    async def bench_scrape(self) -> Dict[str, Any]:
+        """scrape_source for every source over HTTP"""
+        await self.reset("scrape")
+        main = self.main
+        started = time.perf_counter()
+        results = await asyncio.gather(*(main.scrape_source(info, 0) for info in main.FREELANCE_SOURCES.values()))
+        elapsed = time.perf_counter() - started
+        self.scraped = [job for jobs in results for job in jobs]
+        return {
+            "seconds": round(elapsed, 4),
+            "jobs": len(self.scraped),
+            "jobs_per_sec": round(len(self.scraped) / elapsed, 1),
+            "stages": self.timer.report(),
+        }
+
+    def bench_records(self) -> Dict[str, Any]:
+        """Memory of the scraped jobs as records and as dicts, prompt tokens before and after trimming"""
+        main = self.main
+
+        def traced_kb(build: Callable[[], Any]) -> float:
+            tracemalloc.start()
+            try:
+                kept = build()                                                  # noqa: F841, measured while alive
+                size = tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+            return round(size / 1024, 1)
+
+        # Per-user copies as made by filter_jobs_for_user, the field strings are shared
+        dicts_kb = traced_kb(lambda: [job.to_dict() for job in self.scraped])
+        records_kb = traced_kb(lambda: [copy.copy(job) for job in self.scraped])
+        raw = sum(
+            sum(main.estimate_tokens(text) for text in (job.title, job.description, job.price)) + 10 for job in self.scraped
+        )                                                                       # Fields as scraped, before cleaning and trimming
+        trimmed = sum(main.job_prompt_tokens(job, main.PROMPT_FIELD_TOKENS) for job in self.scraped)
+        jobs = len(self.scraped) or 1
+        return {
+            "jobs": len(self.scraped),
+            "dict_kb": dicts_kb,
+            "record_kb": records_kb,
+            "prompt_tokens_raw": raw,
+            "prompt_tokens_trimmed": trimmed,
+            "tokens_per_job_raw": round(raw / jobs, 1),
+            "tokens_per_job_trimmed": round(trimmed / jobs, 1),
+        }
+
+    async def bench_analyze(self) -> Dict[str, Any]:
+        """analyze_jobs_with_ai on the scraped jobs, with cold caches"""
+        await self.reset("analyze")
+        main = self.main
+        jobs = main.filter_jobs_for_user(self.scraped, main.user_settings[BENCH_USER_ID])
+        main.delivery_queue.get().start()
+        started = time.perf_counter()
+        started_monotonic = time.monotonic()
+        await main.analyze_jobs_with_ai(jobs, BENCH_USER_ID)
+        elapsed = time.perf_counter() - started
+        await main.delivery_queue.get().stop(timeout=self.args.drain_timeout)
+        duplicates = int(main.JOBS_FILTERED.value(reason="duplicate") - self.duplicates_before)
+        scored = self.timer.counts.get("deliver", 0)                           # Merged copies are seen, not scored
+        return dict(
+            {
+                "seconds": round(elapsed, 4),
+                "jobs": len(jobs),
+                "scored": scored,
+                "duplicates_merged": duplicates,
+                "notifications": len(self.bot.sent),
+                "first_notification_seconds": self.first_notification(started_monotonic),
+                "stages": self.timer.report(),
+            },
+            **self.model_report(scored)
+        )
+
+    async def bench_search(self) -> Dict[str, Any]:
+        """A full run_search pass: streaming scrape, scoring and delivery"""
+        await self.reset("search")
+        main = self.main
+        main.delivery_queue.get().start()
+        started = time.perf_counter()
+        started_monotonic = time.monotonic()
+        await main.run_search(BENCH_USER_ID)
+        elapsed = time.perf_counter() - started
+        await main.delivery_queue.get().stop(timeout=self.args.drain_timeout)
+        scraped = len(main.job_store.get().known_keys({job.key for job in self.scraped}))
+        duplicates = int(main.JOBS_FILTERED.value(reason="duplicate") - self.duplicates_before)
+        scored = self.timer.counts.get("deliver", 0)                           # Merged copies are seen, not scored
+        return dict(
+            {
+                "seconds": round(elapsed, 4),
+                "jobs": scraped,
+                "jobs_per_sec": round(scraped / elapsed, 1),
+                "scored": scored,
+                "duplicates_merged": duplicates,
+                "notifications": len(self.bot.sent),
+                "first_notification_seconds": self.first_notification(started_monotonic),
+                "stages": self.timer.report(),
+            },
+            **self.model_report(scored)
+        )
+
+    def first_notification(self, started: float) -> float:
+        sent = self.bot.sent
+        return round(sent[0][0] - started, 4) if sent else -1.0
+
+    async def run(self) -> Dict[str, Any]:
+        runner = await start_server(self.pages, self.hosts, self.args.port)
+        try:
+            result = {
+                "config": {
+                    "sources": self.args.sources,
+                    "pages_per_source": len(self.pages),
+                    "model_latency": self.args.latency,
+                    "repeat": self.args.repeat,
+                },
+                "extract": self.bench_extract(),
+                "scrape_source": await self.bench_scrape(),
+                "records": self.bench_records(),
+                "analyze_jobs_with_ai": await self.bench_analyze(),
+                "run_search": await self.bench_search(),
+            }
+        finally:
+            await self.main.source_job_cache.close()
+            await self.main.http_fetcher.close()
+            self.main.job_store.get().close()
+            await runner.cleanup()
+        result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+        return result
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"Config: {result['config']}")
+    for name in ("extract", "scrape_source", "records", "analyze_jobs_with_ai", "run_search"):
+        stage = dict(result[name])
+        stages = stage.pop("stages", {})
+        print(f"\n{name}")
+        for key, value in stage.items():
+            print(f"  {key:<28} {value}")
+        for stage_name, timing in stages.items():
+            print(f"  busy {stage_name:<23} {timing['seconds']:.4f}s in {timing['calls']} calls")
+    print(f"\nPeak RSS: {result['peak_rss_mb']} MB")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmark with recorded pages, a fake model and a fake bot")
+    parser.add_argument("--sources", type=int, default=3, help="Sources serving the recorded pages, one domain each")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds every model call takes")
+    parser.add_argument("--repeat", type=int, default=20, help="Parsing rounds of the extract stage")
+    parser.add_argument("--min-price", type=int, default=0, help="Minimum price of the benchmark user")
+    parser.add_argument("--page-delay", type=float, default=0, help="Pause between two pages of a source in seconds")
+    parser.add_argument("--chat-interval", type=float, default=0, help="Seconds between notifications to one chat")
+    parser.add_argument("--model-rpm", type=float, default=0, help="Model requests per minute, 0 for no limit")
+    parser.add_argument("--model-tpm", type=float, default=0, help="Model tokens per minute, 0 for no limit")
+    parser.add_argument("--drain-timeout", type=float, default=30, help="Seconds to wait for queued notifications")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the local fixture server")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+    with tempfile.TemporaryDirectory(prefix="bot-benchmark-") as workdir:
+        result = asyncio.run(Benchmark(args, workdir).run())
+        os.chdir(ROOT)                                                          # Leave the work directory before it is removed
+    print_report(result)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
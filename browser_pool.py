@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+import psutil
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+from http_fetcher import USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+
+def build_chrome_options(browser_path: str) -> Options:
+    """Build headless Chrome options shared by all pooled drivers"""
+    options = Options()                                                         # Create options
+    options.binary_location = browser_path                                      # Set the browser path
+    options.add_argument("--headless")                                          # Set the headless mode
+    options.add_argument("--no-sandbox")                                        # Set the no-sandbox mode
+    options.add_argument("--disable-dev-shm-usage")                             # Set the disable-dev-shm-usage mode
+    options.add_argument("--disable-gpu")                                       # Set the disable-gpu mode
+    options.add_argument("--window-size=1920,1080")                             # Set the window size
+    options.add_argument(f"--user-agent={USER_AGENT}")                          # Set the user agent
+    return options
+
+
+def chrome_factory(browser_path: str) -> Callable[[], webdriver.Chrome]:
+    """Return a factory that starts a new headless Chrome driver"""
+    def factory() -> webdriver.Chrome:
+        return webdriver.Chrome(options=build_chrome_options(browser_path))
+    return factory
+
+
+class PooledDriver:
+    """Leased WebDriver that counts the pages it has loaded"""
+
+    def __init__(self, driver: webdriver.Chrome) -> None:
+        self.driver = driver
+        self.pages_served = 0                                                   # Pages loaded since start
+        self.created_at = time.monotonic()                                      # Start time of the browser
+
+    def get(self, url: str) -> None:
+        """Load a page and count it towards the recycle limit"""
+        self.pages_served += 1
+        self.driver.get(url)
+
+    def __getattr__(self, name: str):
+        # Everything else is delegated to the real driver
+        return getattr(self.driver, name)
+
+    def memory_mb(self) -> float:
+        """Resident memory of chromedriver and all its browser processes"""
+        try:
+            process = psutil.Process(self.driver.service.process.pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+        except (psutil.Error, AttributeError):
+            return 0.0
+
+    def is_healthy(self) -> bool:
+        """Check that the browser still answers WebDriver commands"""
+        try:
+            _ = self.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def quit(self) -> None:
+        """Close the browser, ignoring errors from an already dead session"""
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error closing pooled driver: {e}")
+
+
+class BrowserPool:
+    """Fixed-size pool of warm headless browsers reused across scrapes"""
+
+    def __init__(
+        self,
+        factory: Callable[[], webdriver.Chrome],
+        size: int = 2,
+        max_pages: int = 50,
+        max_memory_mb: int = 1024,
+    ) -> None:
+        self._factory = factory                                                 # Creates a new driver
+        self._size = size                                                       # Maximum number of browsers
+        self._max_pages = max_pages                                             # Pages before a browser is recycled
+        self._max_memory_mb = max_memory_mb                                     # Memory cap for a single browser
+        self._idle: "queue.LifoQueue[PooledDriver]" = queue.LifoQueue()         # Warm browsers, most recent first
+        self._slots = threading.BoundedSemaphore(size)                          # Limits browsers in use
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledDriver:
+        """Lease a healthy browser, starting one if no warm browser is idle"""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No browser available in the pool")
+
+        try:
+            if self._closed:                                                    # Closed while waiting for a slot
+                raise RuntimeError("Browser pool is closed")
+            while True:
+                try:
+                    pooled = self._idle.get_nowait()                            # Reuse a warm browser
+                except queue.Empty:
+                    logger.info("Starting a new pooled browser")
+                    return PooledDriver(self._factory())                        # Start a new browser
+
+                if pooled.is_healthy():
+                    return pooled
+                logger.warning("Dropping unhealthy pooled browser")
+                pooled.quit()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, pooled: PooledDriver, check_health: bool = False) -> None:
+        """Return a browser to the pool or recycle it when it is worn out"""
+        try:
+            if self._closed:
+                pooled.quit()
+            elif check_health and not pooled.is_healthy():
+                logger.warning("Pooled browser crashed, recycling")
+                pooled.quit()
+            elif pooled.pages_served >= self._max_pages:
+                logger.info(f"Recycling pooled browser after {pooled.pages_served} pages")
+                pooled.quit()
+            elif pooled.memory_mb() > self._max_memory_mb:
+                logger.info(f"Recycling pooled browser using {pooled.memory_mb():.0f} MB")
+                pooled.quit()
+            else:
+                self._idle.put(pooled)                                          # Keep the browser warm
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None) -> Iterator[PooledDriver]:
+        """Lease a browser for the duration of a with-block"""
+        pooled = self.acquire(timeout=timeout)
+        failed = False
+        try:
+            yield pooled
+        except BaseException:
+            failed = True                                                       # Check the browser before reuse
+            raise
+        finally:
+            self.release(pooled, check_health=failed)
+
+    @asynccontextmanager
+    async def lease(self, timeout: Optional[float] = None) -> AsyncIterator[PooledDriver]:
+        """Lease a browser from async code without blocking the event loop"""
+        future = asyncio.ensure_future(asyncio.to_thread(self.acquire, timeout))
+        try:
+            pooled = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The thread keeps waiting for a browser, hand it back as soon as it gets one
+            future.add_done_callback(self._release_abandoned)
+            raise
+        failed = False
+        try:
+            yield pooled
+        except BaseException:
+            failed = True                                                       # Check the browser before reuse
+            raise
+        finally:
+            await asyncio.to_thread(self.release, pooled, failed)
+
+    def _release_abandoned(self, future: "asyncio.Future[PooledDriver]") -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        threading.Thread(target=self.release, args=(future.result(),), daemon=True).start()   # Quitting blocks
+
+    def close(self) -> None:
+        """Quit all idle browsers; leased ones are quit when released"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().quit()
+            except queue.Empty:
+                break
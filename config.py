@@ -0,0 +1,51 @@
+import json
+import logging
+import os
+from typing import Any, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Types of the settings that can be overridden
+CONFIG_TYPES = (str, int, float, bool, list, tuple, dict, type(None))
+
+
+def parse_value(text: str, default: Any) -> Any:
+    """Convert an environment variable to the type of its default"""
+    if isinstance(default, str):
+        return text
+    if isinstance(default, bool):
+        return text.strip().lower() in ("1", "true", "yes", "on")
+    if text.strip().lower() in ("", "none", "null"):
+        return None
+    if isinstance(default, int):
+        return int(text)
+    if isinstance(default, float):
+        return float(text)
+    try:
+        value = json.loads(text)                                                # Lists, dicts and numbers
+    except ValueError:
+        return text                                                             # Plain strings for settings without a default
+    return tuple(value) if isinstance(default, tuple) else value
+
+
+def load_config(defaults: Mapping[str, Any], path: Optional[str] = None, environ: Mapping[str, str] = os.environ) -> Dict[str, Any]:
+    """Settings overriding the upper-case defaults, from a JSON file and then from the environment"""
+    names = {name for name, value in defaults.items() if name.isupper() and isinstance(value, CONFIG_TYPES)}
+    config: Dict[str, Any] = {}
+
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as file:
+            file_values = json.load(file)
+        for name, value in file_values.items():
+            if name not in names:
+                logger.warning(f"Unknown setting in {path}: {name}")
+                continue
+            config[name] = tuple(value) if isinstance(defaults[name], tuple) else value
+
+    for name in names:
+        if name in environ:
+            config[name] = parse_value(environ[name], defaults[name])
+
+    if config:
+        logger.info(f"Settings loaded: {', '.join(sorted(config))}")
+    return config
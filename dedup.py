@@ -0,0 +1,97 @@
+import hashlib
+import random
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from prefilter import tokenize
+
+# Hash functions of a signature and the LSH bands they are split into
+SIGNATURE_SIZE = 64
+BAND_COUNT = 16
+BAND_ROWS = SIGNATURE_SIZE // BAND_COUNT
+MASK_64 = (1 << 64) - 1
+
+# Fixed coefficients, so worker processes build comparable signatures
+_rng = random.Random(20240601)
+_COEFFICIENTS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(SIGNATURE_SIZE)]
+
+
+def shingles(text: str, size: int = 2) -> Set[str]:
+    """Overlapping word n-grams of a text, its words if it is shorter"""
+    tokens = tokenize(text)
+    if len(tokens) <= size:
+        return set(tokens)
+    return {" ".join(tokens[start:start + size]) for start in range(len(tokens) - size + 1)}
+
+
+def minhash(text: str) -> bytes:
+    """MinHash signature of a text, packed as 32-bit values"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")   # Stable, unlike hash()
+        for shingle in shingles(text)
+    ]
+    if not hashes:
+        return b""
+    # Multiply-shift hashing, the high 32 bits of (a * x + b) mod 2^64
+    return array("I", [min([(a * value + b) & MASK_64 for value in hashes]) >> 32 for a, b in _COEFFICIENTS]).tobytes()
+
+
+def similarity(first: bytes, second: bytes) -> float:
+    """Estimated Jaccard similarity of the texts of two signatures"""
+    if not first or len(first) != len(second):
+        return 0.0
+    first_values, second_values = array("I", first), array("I", second)
+    return sum(1 for x, y in zip(first_values, second_values) if x == y) / len(first_values)
+
+
+def job_signature(title: str, description: str) -> bytes:
+    """Signature of the normalized title and description of a job"""
+    return minhash(f"{title} {description}")
+
+
+class NearDuplicateIndex:
+    """Signatures of known jobs, searched for near-duplicates with LSH bands"""
+
+    def __init__(self, min_similarity: float = 0.7, max_entries: int = 10000) -> None:
+        self._min_similarity = min_similarity                                   # Estimated Jaccard similarity of duplicates
+        self._max_entries = max_entries                                         # Oldest jobs are dropped first
+        self._entries: OrderedDict[str, bytes] = OrderedDict()                  # Job key -> signature
+        self._bands: Dict[Tuple[int, bytes], Set[str]] = {}                     # (band, signature rows) -> job keys
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_keys(self, signature: bytes) -> List[Tuple[int, bytes]]:
+        # Similar signatures agree on all rows of at least one band with high probability
+        width = BAND_ROWS * 4
+        return [(band, signature[band * width:(band + 1) * width]) for band in range(BAND_COUNT)]
+
+    def find(self, signature: bytes) -> Optional[Tuple[str, float]]:
+        """Key and similarity of the most similar known job, if it is a near-duplicate"""
+        if not signature:
+            return None
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._bands.get(band_key, ()))
+        best = None
+        for key in candidates:
+            score = similarity(signature, self._entries[key])
+            if score >= self._min_similarity and (best is None or score > best[1]):
+                best = (key, score)
+        return best
+
+    def add(self, key: str, signature: bytes) -> None:
+        """Remember the signature of a job"""
+        if not signature or key in self._entries:
+            return
+        self._entries[key] = signature
+        for band_key in self._band_keys(signature):
+            self._bands.setdefault(band_key, set()).add(key)
+        while len(self._entries) > self._max_entries:
+            oldest, oldest_signature = self._entries.popitem(last=False)
+            for band_key in self._band_keys(oldest_signature):
+                bucket = self._bands[band_key]
+                bucket.discard(oldest)
+                if not bucket:
+                    del self._bands[band_key]
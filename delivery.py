@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from metrics import REGISTRY
+from rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS_SENT = REGISTRY.counter("notifications_sent_total", "Messages delivered to Telegram")
+TELEGRAM_ERRORS = REGISTRY.counter("telegram_errors_total", "Failed Telegram sends by error", ["error"])
+
+# Longest text Telegram accepts in one message
+MAX_MESSAGE_LENGTH = 4096
+
+
+@dataclass
+class OutgoingMessage:
+    """Message waiting to be sent"""
+    chat_id: int
+    text: str
+    on_sent: List[Callable[[], Awaitable[None]]] = field(default_factory=list)    # Called after delivery
+    attempts: int = 0
+
+
+class DeliveryQueue:
+    """Outbound Telegram queue with global and per-chat rate limits, retries and digests"""
+
+    def __init__(
+        self,
+        bot: Bot,
+        messages_per_second: float = 25,
+        chat_interval: float = 1.0,
+        digest_interval: float = 0,
+        max_attempts: int = 5,
+    ) -> None:
+        self._bot = bot
+        self._limiter = RateLimiter(messages_per_second * 60, burst=messages_per_second)    # Limit of the whole bot
+        self._chat_interval = chat_interval                                     # Seconds between messages to one chat
+        self._digest_interval = digest_interval                                 # Seconds matches are collected, 0 sends at once
+        self._max_attempts = max_attempts
+        self._pending: Dict[int, Deque[OutgoingMessage]] = {}                   # Chat ID -> messages in order
+        self._next_send: Dict[int, float] = {}                                  # Chat ID -> earliest next send
+        self._digests: Dict[int, List[OutgoingMessage]] = {}                    # Chat ID -> matches for the next digest
+        self._paused_until = 0.0                                                # Set by Telegram flood control
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Start the sender, and the digest timer if digests are enabled"""
+        self._tasks.append(asyncio.create_task(self._send_loop(), name="delivery-sender"))
+        if self._digest_interval > 0:
+            self._tasks.append(asyncio.create_task(self._digest_loop(), name="delivery-digest"))
+
+    def enqueue(self, chat_id: int, text: str, on_sent: Optional[Callable[[], Awaitable[None]]] = None, digest: bool = False) -> None:
+        """Queue a message without waiting for it to be sent"""
+        message = OutgoingMessage(chat_id, text, [on_sent] if on_sent else [])
+        if digest and self._digest_interval > 0:
+            self._digests.setdefault(chat_id, []).append(message)
+        else:
+            self._push(message)
+
+    def depth(self) -> int:
+        """Messages waiting to be sent"""
+        return sum(len(messages) for messages in self._pending.values()) + sum(len(d) for d in self._digests.values())
+
+    def _push(self, message: OutgoingMessage, front: bool = False) -> None:
+        messages = self._pending.setdefault(message.chat_id, deque())
+        if front:
+            messages.appendleft(message)
+        else:
+            messages.append(message)
+        self._wakeup.set()
+
+    def _flush_digests(self) -> None:
+        """Turn the collected matches of every chat into digest messages"""
+        digests, self._digests = self._digests, {}
+        for chat_id, messages in digests.items():
+            if len(messages) == 1:
+                self._push(messages[0])
+                continue
+
+            # Join the matches, splitting where a message would get too long
+            parts: List[OutgoingMessage] = []
+            for message in messages:
+                if parts and len(parts[-1].text) + len(message.text) + 2 <= MAX_MESSAGE_LENGTH:
+                    parts[-1].text += "\n\n" + message.text
+                    parts[-1].on_sent.extend(message.on_sent)
+                else:
+                    parts.append(OutgoingMessage(chat_id, f"{len(messages)} new matches:\n\n{message.text}", list(message.on_sent)))
+            for part in parts:
+                self._push(part)
+
+    async def _digest_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._digest_interval)
+            self._flush_digests()
+
+    def _next_ready(self, now: float):
+        """Chat that may be sent to now, or the time the next one becomes ready"""
+        earliest = None
+        for chat_id, messages in self._pending.items():
+            if not messages:
+                continue
+            ready_at = self._next_send.get(chat_id, 0.0)
+            if ready_at <= now:
+                return chat_id, None
+            earliest = ready_at if earliest is None else min(earliest, ready_at)
+        return None, earliest
+
+    async def _send_loop(self) -> None:
+        while True:
+            now = time.monotonic()
+            if self._paused_until > now:                                        # Flood control pause
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            chat_id, ready_at = self._next_ready(now)
+            if chat_id is None:
+                self._wakeup.clear()
+                timeout = ready_at - now if ready_at is not None else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            message = self._pending[chat_id].popleft()
+            if not self._pending[chat_id]:
+                del self._pending[chat_id]
+            await self._limiter.acquire()
+            await self._send(message)
+
+    async def _send(self, message: OutgoingMessage) -> None:
+        message.attempts += 1
+        self._next_send[message.chat_id] = time.monotonic() + self._chat_interval
+        try:
+            await self._bot.send_message(message.chat_id, message.text[:MAX_MESSAGE_LENGTH])
+        except TelegramRetryAfter as e:
+            TELEGRAM_ERRORS.inc(error=type(e).__name__)
+            # Telegram asks everyone to wait, the message keeps its place
+            logger.warning(f"Telegram flood control, retrying in {e.retry_after}s")
+            self._paused_until = time.monotonic() + e.retry_after
+            self._push(message, front=True)
+            return
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            self.failed += 1
+            TELEGRAM_ERRORS.inc(error=type(e).__name__)
+            logger.error(f"Dropping message to chat {message.chat_id}: {e}")
+            return
+        except Exception as e:
+            TELEGRAM_ERRORS.inc(error=type(e).__name__)
+            if message.attempts >= self._max_attempts:
+                self.failed += 1
+                logger.error(f"Giving up on message to chat {message.chat_id} after {message.attempts} attempts: {e}")
+                return
+            delay = min(60, 2 ** message.attempts)
+            logger.warning(f"Error sending message to chat {message.chat_id}, retrying in {delay}s: {e}")
+            self._next_send[message.chat_id] = time.monotonic() + delay
+            self._push(message, front=True)
+            return
+
+        self.sent += 1
+        NOTIFICATIONS_SENT.inc()
+        for callback in message.on_sent:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"Error in delivery callback: {e}")
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Send what is queued, waiting up to timeout seconds, then stop"""
+        self._flush_digests()
+        deadline = time.monotonic() + timeout
+        while self.depth() and time.monotonic() < deadline and self._tasks:
+            await asyncio.sleep(0.1)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self.depth():
+            logger.warning(f"Delivery stopped with {self.depth()} messages unsent")
@@ -0,0 +1,181 @@
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from cssselect import GenericTranslator
+from lxml import etree
+from lxml import html as lxml_html
+
+from job import Job, clean_text, parse_price
+
+logger = logging.getLogger(__name__)
+
+# Placeholders for missing job fields
+NO_TITLE = "No title"
+NO_DESCRIPTION = "No description"
+NO_PRICE = "Цена не указана"
+NO_DATE = "Дата не указана"
+
+# Tags rendered on their own line by the browser
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "fieldset", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+    "nav", "ol", "p", "pre", "section", "table", "tr", "ul",
+}
+
+# Query parameters that don't change the job a URL points to
+TRACKING_PARAMS = {"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "ref", "from"}
+
+# Compiled CSS selectors, shared by all pages of all sources
+_selector_cache: Dict[Tuple[str, str], etree.XPath] = {}
+_translator = GenericTranslator()
+
+
+def compile_selector(selector: str, prefix: str = "descendant-or-self::") -> etree.XPath:
+    """Compile a CSS selector once and reuse it"""
+    compiled = _selector_cache.get((prefix, selector))
+    if compiled is None:
+        compiled = _selector_cache[(prefix, selector)] = etree.XPath(_translator.css_to_xpath(selector, prefix=prefix))
+    return compiled
+
+
+def element_text(element) -> str:
+    """Visible text of an element, close to what WebDriver's .text returns"""
+    parts = []
+
+    def walk(node) -> None:
+        if not isinstance(node.tag, str):                                       # Skip comments and processing instructions
+            if node.tail:
+                parts.append(node.tail)
+            return
+        tag = node.tag.lower()
+        if tag in ("script", "style", "template"):
+            pass
+        elif tag == "br":
+            parts.append("\n")
+        else:
+            if tag in BLOCK_TAGS:
+                parts.append("\n")
+            if node.text:
+                parts.append(node.text)
+            for child in node:
+                walk(child)
+            if tag in BLOCK_TAGS:
+                parts.append("\n")
+        if node.tail and node is not element:
+            parts.append(node.tail)
+
+    walk(element)
+
+    # Collapse whitespace inside lines and drop empty lines
+    lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def first_match(element, selector: str):
+    """First descendant matching a selector, or None"""
+    matches = compile_selector(selector, prefix="descendant::")(element)   # Never the element itself
+    return matches[0] if matches else None
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a job URL so that the same job always gets the same key"""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if k.lower() not in TRACKING_PARAMS))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def job_key(source: str, url: str, title: str, description: str) -> str:
+    """Stable key of a job: its normalized URL, or a content hash if it has none"""
+    if url:
+        return normalize_url(url)
+    content = "\n".join((source, " ".join(title.split()), " ".join(description.split())))
+    return "sha1:" + hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def build_job(
+    source_info: Dict[str, str],
+    page: int,
+    title: str,
+    url: str,
+    description: str,
+    price_text: str,
+    date_text: str,
+    min_price: int,
+) -> Optional[Job]:
+    """Build a job record, or None if it is below the minimum price"""
+    # If the URL is relative, add the base URL
+    if url and not url.startswith("http"):
+        base_url = "/".join(source_info["url"].split("/")[:3])                  # Create the base URL
+        url = base_url + ('' if url.startswith('/') else '/') + url             # Add the base URL
+
+    # Parse the price range, "100-200 $" is 100 to 200
+    price_min, price_max = parse_price(price_text) if price_text != NO_PRICE else (0, 0)
+
+    # Pass the job if even the highest price is less than the minimum
+    if price_max < min_price:
+        return None
+
+    # Create a job record(You can customize the Job fields)
+    title = clean_text(title)
+    description = clean_text(description)
+    return Job(
+        key=job_key(source_info["name"], url, title, description),
+        source=source_info["name"],
+        title=title,
+        description=description,
+        price=clean_text(price_text),
+        date=clean_text(date_text),
+        url=url,
+        page=page,
+        price_min=price_min,
+        price_max=price_max
+    )
+
+
+def get_page_url(source_info: Dict[str, str], page: int) -> str:
+    """Build the URL of a listing page"""
+    return f"{source_info['url']}?page={page}"
+
+
+def extract_jobs(page_html: str, page_url: str, source_info: Dict[str, str], page: int, min_price: int) -> List[Job]:
+    """Parse all job cards of a page snapshot in-process"""
+    jobs = []
+    if not page_html:
+        return jobs
+
+    document = lxml_html.fromstring(page_html)
+    job_elements = compile_selector(source_info["selector"])(document)
+    logger.info(f"Found {len(job_elements)} job elements on page {page}")
+
+    for element in job_elements:
+        try:
+            # Title and URL, if available
+            title_element = first_match(element, source_info["title_selector"])
+            if title_element is not None:
+                title = element_text(title_element)
+                href = title_element.get("href")
+                url = urljoin(page_url, href) if href else ""                   # Resolved like the href property
+            else:
+                title = NO_TITLE
+                url = ""
+
+            # Description, price and date, if available
+            description_element = first_match(element, source_info["description_selector"])
+            description = element_text(description_element) if description_element is not None else NO_DESCRIPTION
+
+            price_element = first_match(element, source_info["price_selector"])
+            price_text = element_text(price_element) if price_element is not None else NO_PRICE
+
+            date_element = first_match(element, source_info["date_selector"])
+            date_text = element_text(date_element) if date_element is not None else NO_DATE
+
+            job = build_job(source_info, page, title, url, description, price_text, date_text, min_price)
+            if job is not None:
+                jobs.append(job)
+        except Exception as e:
+            logger.error(f"Error parsing job element: {e}")
+
+    return jobs
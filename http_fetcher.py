@@ -0,0 +1,70 @@
+import logging
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# User agent of the HTTP client and of every pooled browser
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+)
+
+
+class HttpFetcher:
+    """Pooled keep-alive HTTP client with conditional GET for static listings"""
+
+    def __init__(self, user_agent: str, timeout: float = 30, limit: int = 20, limit_per_host: int = 2) -> None:
+        self._user_agent = user_agent                                           # User agent sent with every request
+        self._timeout = aiohttp.ClientTimeout(total=timeout)                    # Total timeout of a request
+        self._limit = limit                                                     # Open connections in total
+        self._limit_per_host = limit_per_host                                   # Open connections per host
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._validated: Dict[str, Tuple[Optional[str], Optional[str], str]] = {}    # URL -> (ETag, Last-Modified, HTML)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the shared session on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._limit, limit_per_host=self._limit_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._timeout,
+                headers={
+                    "User-Agent": self._user_agent,
+                    "Accept": "text/html,application/xhtml+xml",
+                    "Accept-Encoding": "gzip, deflate",
+                },
+            )
+        return self._session
+
+    async def fetch(self, url: str, timeout: Optional[float] = None) -> str:
+        """Get the page HTML, the copy of the last fetch if it has not changed since"""
+        headers = {}
+        etag, last_modified, cached_html = self._validated.get(url, (None, None, ""))
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None   # Session timeout by default
+        async with self._get_session().get(url, headers=headers, timeout=request_timeout) as response:
+            if response.status == 304:                                          # Page has not changed
+                logger.info(f"Not modified: {url}")
+                return cached_html
+            response.raise_for_status()
+            page_html = await response.text()
+
+            # Remember validators and the page for the next conditional request
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self._validated[url] = (etag, last_modified, page_html)
+            else:
+                self._validated.pop(url, None)
+            return page_html
+
+    async def close(self) -> None:
+        """Close the shared session and its connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
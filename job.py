@@ -0,0 +1,72 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+# Amounts in a price text: "100", "1 500", "10,000", "12.50", "1,500.00" or "1.5k"
+AMOUNT_PATTERN = re.compile(
+    r'(\d{1,3}(?:[ \u00a0\u202f,.]\d{3})+|\d+)'                              # Whole part, with thousands separators
+    r'(?:[.,](\d{1,2})(?!\d))?'                                               # Fraction of one or two digits
+    r'(?:\s*(k|к|тыс)\b)?',
+    re.IGNORECASE
+)
+# Price given only as an upper bound: "до 5 000 ₽", "up to $500"
+UP_TO_PATTERN = re.compile(r'^\W*(до|up\s+to|max)\b', re.IGNORECASE)
+
+
+def clean_text(text: str) -> str:
+    """Text with runs of whitespace collapsed to single spaces"""
+    return " ".join(text.split())
+
+
+def parse_price(price_text: str) -> Tuple[int, int]:
+    """Lowest and highest amount of a price text, (0, 0) if it has none"""
+    amounts = []
+    for digits, fraction, thousands in AMOUNT_PATTERN.findall(price_text):
+        cents = int(re.sub(r'\D', '', digits)) * 100 + int(fraction.ljust(2, "0") or 0)   # Exact, unlike floats
+        amounts.append(cents * 1000 // 100 if thousands else cents // 100)       # Rounded down, compares right with whole minimums
+    if not amounts:
+        return 0, 0
+    if len(amounts) == 1:
+        if UP_TO_PATTERN.match(price_text):
+            return 0, amounts[0]
+        return amounts[0], amounts[0]
+    low, high = sorted(amounts[:2])                                             # "100-200 $", "от 10 000 до 20 000"
+    return low, high
+
+
+@dataclass(slots=True)
+class Job:
+    """Scraped job with normalized fields, plus the per-user state of a search"""
+    key: str
+    source: str
+    title: str
+    description: str
+    price: str                                                                  # Price as shown on the page
+    date: str
+    url: str
+    page: int
+    price_min: int = 0                                                          # Parsed price range, 0 if unknown
+    price_max: int = 0
+
+    # Set on the copy of a user while the job moves through the pipeline
+    signature: bytes = b""                                                      # MinHash of title and description, see dedup.py
+    prescore: float = 0.0
+    cache_key: str = ""
+    relevance_score: int = 0
+    relevance_reason: str = ""
+    duplicates: Tuple["Job", ...] = ()                                          # Near-duplicates merged into this job
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Scraped fields of the job, for storage"""
+        return {
+            "key": self.key,
+            "source": self.source,
+            "title": self.title,
+            "description": self.description,
+            "price": self.price,
+            "date": self.date,
+            "url": self.url,
+            "page": self.page,
+            "price_min": self.price_min,
+            "price_max": self.price_max,
+        }
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from job import Job
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SOURCE_LOOKUPS = REGISTRY.counter(
+    "source_cache_lookups_total", "Source reads served from the cache, joined to a running scrape or scraped", ["result"]
+)
+
+
+class _InFlightScrape:
+    """Scrape in progress whose pages are shared with every reader"""
+
+    def __init__(self) -> None:
+        self.pages: List[List[Job]] = []                                        # Pages scraped so far
+        self.done = False
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+
+class SourceJobCache:
+    """Time-bounded cache of scraped jobs shared by all users"""
+
+    def __init__(self, ttl: float) -> None:
+        self._ttl = ttl                                                         # Seconds a scrape stays fresh
+        self._entries: Dict[str, Tuple[float, List[Job]]] = {}                  # Source ID -> (scraped at, jobs)
+        self._in_flight: Dict[str, _InFlightScrape] = {}                        # One scrape per source at a time
+
+    def _fresh(self, source_id: str):
+        entry = self._entries.get(source_id)
+        if entry is not None and time.monotonic() - entry[0] < self._ttl:
+            return entry[1]
+        return None
+
+    def prune(self) -> None:
+        """Drop entries older than the TTL"""
+        now = time.monotonic()
+        for source_id in [s for s, (scraped_at, _) in self._entries.items() if now - scraped_at >= self._ttl]:
+            del self._entries[source_id]
+
+    async def _scrape(
+        self,
+        source_id: str,
+        in_flight: _InFlightScrape,
+        scrape_pages: Callable[[], AsyncIterator[List[Job]]],
+    ) -> None:
+        # Runs as its own task, so a reader that stops does not stop the scrape for the others
+        jobs: List[Job] = []
+        try:
+            async for page_jobs in scrape_pages():
+                jobs.extend(page_jobs)
+                async with in_flight.changed:
+                    in_flight.pages.append(page_jobs)
+                    in_flight.changed.notify_all()
+            self.prune()
+            self._entries[source_id] = (time.monotonic(), jobs)
+            logger.info(f"Cached {len(jobs)} jobs from {source_id}")
+        except Exception as e:
+            logger.error(f"Error scraping {source_id}: {e}")
+        finally:
+            self._in_flight.pop(source_id, None)
+            async with in_flight.changed:
+                in_flight.done = True
+                in_flight.changed.notify_all()
+
+    async def stream(
+        self,
+        source_id: str,
+        scrape_pages: Callable[[], AsyncIterator[List[Job]]],
+    ) -> AsyncIterator[List[Job]]:
+        """Yield the jobs of a source page by page, scraping it only if the cache is stale"""
+        jobs = self._fresh(source_id)
+        if jobs is not None:
+            SOURCE_LOOKUPS.inc(result="hit")
+            if jobs:
+                yield jobs
+            return
+
+        # Join the running scrape of the source, or start one
+        in_flight = self._in_flight.get(source_id)
+        if in_flight is None:
+            SOURCE_LOOKUPS.inc(result="scraped")
+            in_flight = self._in_flight[source_id] = _InFlightScrape()
+            in_flight.task = asyncio.create_task(self._scrape(source_id, in_flight, scrape_pages))
+        else:
+            SOURCE_LOOKUPS.inc(result="joined")
+
+        read = 0
+        while True:
+            async with in_flight.changed:
+                await in_flight.changed.wait_for(lambda: len(in_flight.pages) > read or in_flight.done)
+                pages = in_flight.pages[read:]
+                done = in_flight.done
+            read += len(pages)
+            for page_jobs in pages:
+                yield page_jobs
+            if done:
+                return
+
+    async def close(self) -> None:
+        """Cancel scrapes that are still running"""
+        tasks = [in_flight.task for in_flight in self._in_flight.values() if in_flight.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
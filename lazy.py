@@ -0,0 +1,34 @@
+import asyncio
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Lazy(Generic[T]):
+    """Component created by its factory on first use, at most once"""
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._created = False
+        self._lock = threading.Lock()                                           # Warm-up threads and first use may race
+
+    @property
+    def created(self) -> bool:
+        return self._created
+
+    def get(self) -> T:
+        """The component, created now if needed (blocking)"""
+        if not self._created:
+            with self._lock:
+                if not self._created:
+                    self._value = self._factory()
+                    self._created = True
+        return self._value
+
+    async def aget(self) -> T:
+        """The component, created in a thread if needed so the event loop keeps running"""
+        if self._created:
+            return self._value
+        return await asyncio.to_thread(self.get)
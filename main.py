@@ -1,549 +1,1042 @@
-import asyncio
-import logging
-import re
-from typing import List, Dict, Any
-from aiogram import Bot, Dispatcher, types
-from aiogram.filters import Command
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
-from aiogram.utils.keyboard import InlineKeyboardBuilder
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain_deepseek import ChatDeepSeek
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.chrome.options import Options
-import random
-
-# Logging setup
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    filename="bot.log"
-)
-logger = logging.getLogger(__name__)
-
-# Configuration
-TELEGRAM_TOKEN = "TELEGRAM_TOKEN"                            # Your Telegram token
-MODEL_API_KEY = "MODEL_API_KEY"                              # Model API key
-ALLOWED_USERS = ["ALLOWED_USERS"]                            # List of allowed users (Telegram user IDs)
-BROWSER_PATH  = "C:/Program Files/example.exe"  # Path to the browser executable
-
-# Initialize LangChain model or some other model
-llm = ChatDeepSeek(
-    model="model_name",                         # Your model name
-    temperature=0,
-    max_tokens=None,
-    timeout=None,
-    max_retries=2,
-    api_key=MODEL_API_KEY
-)
-
-# List of freelance sources
-FREELANCE_SOURCES = {
-    "Example_name.com": {
-        "name": "Example_name.com",
-        "url": "https://www.example_name/projects/",
-        "selector": "div.b-post",
-        "title_selector": "a.b-post__link",
-        "description_selector": "div.b-post__body",
-        "price_selector": "div.b-post__price",
-        "date_selector": "div.b-post__foot",
-    },
-}
-
-# User settings
-user_settings = {}
-
-# LangChain prompts for relevance analysis and skills extraction(Example prompts)
-relevance_template = """
-        Please analyze this freelance job and determine how well it matches the following skills: {skills}.
-        Give the shortest possible answer, no more than 1 sentence.
-        Job:
-        Title: {title}
-        Description: {description}
-        Budget: {price}
-        
-        Give a relevance score from 0 to 10, where 10 is a perfect match for the skills, and explain your score.
-        Return the answer in the format:
-        Relevance: [score]
-        Reason: [explanation]
-        """
-
-# Create a prompt template
-relevance_prompt = PromptTemplate(
-    input_variables=["skills", "title", "description", "price"],
-    template=relevance_template
-)
-
-# Skills extraction prompt(Example prompt)
-skills_template = """
-        The user is looking for freelance jobs with the query: "{query}"
-        List 3-5 key skills that may be related to this query.
-        Give a very short answer in the form of a list of skills, no more than 1 sentence.
-        """
-
-# Create a prompt template
-skills_prompt = PromptTemplate(
-    input_variables=["query"],
-    template=skills_template
-)
-
-# LangChain instances for relevance analysis and skills extraction
-relevance_chain = LLMChain(llm=llm, prompt=relevance_prompt)
-skills_chain = LLMChain(llm=llm, prompt=skills_prompt)
-
-# Dispatcher and bot initialization
-bot = Bot(token=TELEGRAM_TOKEN)
-dp = Dispatcher()
-
-# Handlers for commands
-@dp.message(Command("start"))
-async def start_handler(message: Message) -> None:
-    """Start command handler"""
-    user_id = message.from_user.id
-
-    if user_id not in ALLOWED_USERS:
-        await message.answer("I'm sorry, you are not allowed to use this bot.")
-        return
-
-    # Initialize user settings if not present
-    if user_id not in user_settings:
-        user_settings[user_id] = {
-            "skills": [],                               # User skills
-            "sources": list(FREELANCE_SOURCES.keys()),  # Selected sources
-            "min_price": 0,                             # Minimum price
-            "notification_interval": 30,                # Notification interval in minutes
-            "last_jobs": set(),                         # Last found jobs
-            "task_running": False                       # Task status
-        }
-
-    # Send welcome message(You can customize this message, to example: add a list of available commands)
-    await message.answer(
-        "Hello! I am a bot for finding freelance jobs. "
-        "Use the following commands:\n"
-        "/skills - set key skills\n"
-        "/sources - select sources for search\n"
-        "/price - set minimum price\n"
-        "/interval - set notification interval\n"
-        "/start_search - start job search\n"
-        "/stop_search - stop job search"
-    )
-
-# Handlers for setting user skills, sources, minimum price, and notification interval
-@dp.message(Command("skills"))
-async def set_skills_handler(message: Message) -> None:
-    """Skills command handler"""
-    user_id = message.from_user.id                                          # Get user ID
-
-    if user_id not in ALLOWED_USERS:                                        # Check if user is allowed
-        return
-
-    command_args = message.text.split(maxsplit=1)                           # Split the message text
-    if len(command_args) < 2:                                               # Check if the message contains skills
-        await message.answer(
-            "Create a list of skills separated by commas. For example: /skills Python, Django, Flask, AI"
-        )
-        return
-
-    skills = [skill.strip() for skill in command_args[1].split(",")]        # Extract skills from the message
-    user_settings[user_id]["skills"] = skills                               # Set user skills
-
-    await message.answer(f"Succesfully set skills: {', '.join(skills)}")    # Send a confirmation message
-
-# Handler for setting sources
-@dp.message(Command("sources"))
-async def set_sources_handler(message: Message) -> None:
-    """Sources command handler"""
-    user_id = message.from_user.id                                      # Get user ID
-
-    if user_id not in ALLOWED_USERS:                                    # Check if user is allowed
-        return
-
-    builder = InlineKeyboardBuilder()
-    for source_id, source_info in FREELANCE_SOURCES.items():            # Create a list of sources
-        is_selected = source_id in user_settings[user_id]["sources"]    # Check if the source is selected
-        status = "✅" if is_selected else "❌"                          # Set the status
-        builder.add(InlineKeyboardButton(
-            text=f"{source_info['name']} {status}",                     # Add a button for the source
-            callback_data=f"source_{source_id}"                         # Set the callback data
-        ))
-
-    builder.add(InlineKeyboardButton(
-        text="Finish",                                                  # Add a button to finish the selection
-        callback_data="sources_done"                                    # Set the callback data
-    ))
-    builder.adjust(1)                                                   # Adjust the buttons layout
-
-    await message.answer(
-        "Choose sources for search:",                              # Send a message to choose sources
-        reply_markup=builder.as_markup()                                # Add the keyboard
-    )
-
-# Handler for setting the minimum price
-@dp.message(Command("price"))
-async def set_min_price_handler(message: Message) -> None:
-    """/price command handler"""
-    user_id = message.from_user.id                                                  # Get user ID
-
-    if user_id not in ALLOWED_USERS:                                                # Check if user is allowed
-        return
-
-    command_args = message.text.split(maxsplit=1)                                   # Split the message text
-    if len(command_args) < 2 or not command_args[1].isdigit():                      # Check if the message contains the price
-        await message.answer("Choose the minimum price. For example: /price 30")    # Send a message to set the price
-        return
-
-    min_price = int(command_args[1])                                                # Extract the price from the message
-    user_settings[user_id]["min_price"] = min_price                                 # Set the minimum price
-
-    await message.answer(f"Mimimum price set: {min_price}")                         # Send a confirmation message
-
-# Handler for setting the notification interval
-@dp.message(Command("interval"))
-async def set_interval_handler(message: Message) -> None:
-    """/interval command handler"""
-    user_id = message.from_user.id                                                          # Get user ID
-
-    if user_id not in ALLOWED_USERS:                                                        # Check if user is allowed
-        return
-
-    command_args = message.text.split(maxsplit=1)                                           # Split the message text
-    if len(command_args) < 2 or not command_args[1].isdigit():                              # Check if the message contains the interval
-        await message.answer("Set the notification interval. For example: /interval 30")    # Send a message to set the interval
-        return
-
-    interval = int(command_args[1])                                                         # Extract the interval from the message
-    if interval < 5:                                                                        # Check if the interval is at least 5 minutes
-        await message.answer("Interval should be at least 5 minutes")
-        return
-
-    user_settings[user_id]["notification_interval"] = interval                              # Set the notification interval
-
-    await message.answer(f"Inverval set: {interval} minutes")
-
-# Handler for button clicks
-@dp.callback_query()
-async def button_callback_handler(callback: types.CallbackQuery) -> None:
-    """Button click handler"""
-    user_id = callback.from_user.id                                         # Get user ID
-
-    if user_id not in ALLOWED_USERS:                                        # Check if user is allowed
-        await callback.answer()                                             # Send a response
-        return
-
-    data = callback.data                                                    # Get the callback data
-
-    if data.startswith("source_"):                                          # Check if the data is for a source
-        source_id = data.replace("source_", "")                 # Extract the source ID
-        if source_id in user_settings[user_id]["sources"]:                  # Check if the source is selected
-            user_settings[user_id]["sources"].remove(source_id)             # Remove the source
-        else:
-            user_settings[user_id]["sources"].append(source_id)             # Add the source
-
-        # Create a keyboard with sources
-        builder = InlineKeyboardBuilder()
-        for src_id, source_info in FREELANCE_SOURCES.items():               # Create a list of sources
-            is_selected = src_id in user_settings[user_id]["sources"]       # Check if the source is selected
-            status = "✅" if is_selected else "❌"                          # Set the status
-            builder.add(InlineKeyboardButton(
-                text=f"{source_info['name']} {status}",                     # Add a button for the source
-                callback_data=f"source_{src_id}"                            # Set the callback data
-            ))
-
-        builder.add(InlineKeyboardButton(
-            text="Finish",                                                  # Add a button to finish the selection
-            callback_data="sources_done"                                    # Set the callback data
-        ))
-        builder.adjust(1)                                                   # Adjust the buttons layout
-
-        await callback.message.edit_text(                                   # Edit the message
-            "Select sources for search:",
-            reply_markup=builder.as_markup()                                # Add the keyboard
-        )
-
-    elif data == "sources_done":                                            # Check if the data is for finishing the selection
-        selected_sources = [FREELANCE_SOURCES[s]["name"] for s in user_settings[user_id]["sources"]]    # Get the selected sources
-        await callback.message.edit_text(f"Succesfully set sources: {', '.join(selected_sources)}")     # Send a confirmation message
-    await callback.answer()                                                                             # Send a response
-
-# Handler for starting the search
-@dp.message(Command("start_search"))
-async def start_search_handler(message: Message) -> None:
-    """/start_search command handler"""
-    user_id = message.from_user.id                                                      # Get user ID
-
-    if user_id not in ALLOWED_USERS:                                                    # Check if user is allowed
-        return
-
-
-    # Initialize user settings if not present
-    if user_id not in user_settings:
-        user_settings[user_id] = {
-            "skills": [],                                                               # User skills
-            "sources": list(FREELANCE_SOURCES.keys()),                                  # Selected sources
-            "min_price": 0,                                                             # Minimum price
-            "notification_interval": 30,                                                # Notification interval in minutes
-            "last_jobs": set(),                                                         # Last found jobs
-            "task_running": False                                                       # Task status
-        }
-
-    if not user_settings[user_id]["skills"]:                                            # Check if the user has set skills
-        await message.answer("First set the skills using the /skills command")          # Send a message to set the skills
-        return
-
-    if user_settings[user_id]["task_running"]:                                          # Check if the search is already running
-        await message.answer("Search is already running")                               # Send a message
-        return
-
-    user_settings[user_id]["task_running"] = True                                       # Set the task status to running
-    user_settings[user_id]["last_jobs"] = set()                                         # Clear the last found jobs
-
-    await message.answer(                                                               # Send a message
-        f"Succesfully started search with the following settings:\n"
-        f"Searched skills: {', '.join(user_settings[user_id]['skills'])}\n"
-        f"Mimimum price: {user_settings[user_id]['min_price']}\n"
-        f"Inverval: {user_settings[user_id]['notification_interval']} minutes"
-    )
-
-    # Run the search task
-    all_jobs = await scrape_all_sources(user_id)                                        # Scrape all sources
-    await analyze_jobs_with_ai(all_jobs, user_settings[user_id]["skills"], message)     # Analyze jobs with AI
-
-# Handler for stopping the search
-@dp.message(Command("stop_search"))
-async def stop_search_handler(message: Message) -> None:
-    """/stop_search command handler"""
-    user_id = message.from_user.id                      # Get user ID
-
-    if user_id not in ALLOWED_USERS:                    # Check if user is allowed
-        return
-
-    if not user_settings[user_id]["task_running"]:      # Check if the search is running
-        await message.answer("Search is not running")   # Send a message
-        return
-
-    user_settings[user_id]["task_running"] = False      # Set the task status to not running
-    await message.answer("Search stopped")              # Send a message
-
-# Asynchronous functions for scraping freelance sources
-async def scrape_source(source_info: Dict[str, str], min_price: int) -> List[Dict[str, Any]]:
-    """Parse jobs from a single source"""
-
-    # Settings for Selenium
-    options = Options()                                                         # Create options
-    options.binary_location = BROWSER_PATH                                      # Set the browser path
-    options.add_argument("--headless")                                          # Set the headless mode
-    options.add_argument("--no-sandbox")                                        # Set the no-sandbox mode
-    options.add_argument("--disable-dev-shm-usage")                             # Set the disable-dev-shm-usage mode
-    options.add_argument("--disable-gpu")                                       # Set the disable-gpu mode
-    options.add_argument("--window-size=1920,1080")                             # Set the window size
-    options.add_argument(                                                       # Set the user agent
-        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
-
-    timeout_random = random.randint(5, 60)                                  # Set the timeout
-
-    jobs = []
-    driver = None
-    try:
-        # Driver initialization
-        driver = webdriver.Chrome(options=options)
-
-        # Iterate over pages
-        for page in range(1, 3):
-            # URL for the current page
-            page_url = f"{source_info['url']}?page={page}"
-            driver.get(page_url)
-
-            # Wait for the job elements to load on the page
-            wait = WebDriverWait(driver, timeout_random)
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, source_info["selector"])))
-
-            # Find job elements on the page
-            job_elements = driver.find_elements(By.CSS_SELECTOR, source_info["selector"])
-            logger.info(f"Found {len(job_elements)} job elements on page {page}")
-
-            for element in job_elements:
-                try:
-                    # Data extraction
-                    try:
-                        # Title and URL, if available
-                        title_element = element.find_element(By.CSS_SELECTOR, source_info["title_selector"])
-                        title = title_element.text
-                        url = title_element.get_attribute("href")
-                    except NoSuchElementException:
-                        title = "No title"
-                        url = ""
-
-                    try:
-                        # Description, if available
-                        description_element = element.find_element(By.CSS_SELECTOR, source_info["description_selector"])
-                        description = description_element.text
-                    except NoSuchElementException:
-                        description = "No description"
-
-                    try:
-                        # Price, if available
-                        price_element = element.find_element(By.CSS_SELECTOR, source_info["price_selector"])
-                        price_text = price_element.text
-                    except NoSuchElementException:
-                        price_text = "Цена не указана"
-
-                    try:
-                        # Date, if available
-                        date_element = element.find_element(By.CSS_SELECTOR, source_info["date_selector"])
-                        date_text = date_element.text
-                    except NoSuchElementException:
-                        date_text = "Дата не указана"
-
-                    # If the URL is relative, add the base URL
-                    if url and not url.startswith("http"):
-                        base_url = "/".join(source_info["url"].split("/")[:3])          # Create the base URL
-                        url = base_url + ('' if url.startswith('/') else '/') + url     # Add the base URL
-
-                    # Remove non-numeric characters from the price
-                    price_value = 0
-                    if price_text != "Цена не указана":
-                        price_matches = re.findall(r'\d+', price_text)
-                        if price_matches:
-                            price_value = int("".join(price_matches))
-
-                    # Pass the job if the price is less than the minimum
-                    if price_value < min_price:
-                        continue
-
-                    # Create a job dictionary(You can customize this dictionary)
-                    job = {
-                        "source": source_info["name"],
-                        "title": title,
-                        "description": description,
-                        "price": price_text,
-                        "date": date_text,
-                        "url": url,
-                        "price_value": price_value,
-                        "page": page
-                    }
-
-                    jobs.append(job)
-                except Exception as e:
-                    logger.error(f"Error parsing job element: {e}")
-            # Wait for a random time
-            await asyncio.sleep(random.randint(3, 7))
-    except Exception as e:
-        logger.error(f"Error in Selenium scraping for {source_info['name']}: {e}")
-    finally:
-        # Close the driver
-        if driver:
-            driver.quit()
-
-    return jobs
-
-# Asynchronous functions for scraping all freelance sources and analyzing jobs with AI
-async def scrape_all_sources(user_id: int) -> List[Dict[str, Any]]:
-    """Parse jobs from all sources"""
-    all_jobs = []
-
-    for source_id in user_settings[user_id]["sources"]:                                                 # Iterate over sources
-        source_info = FREELANCE_SOURCES[source_id]                                                      # Get the source info
-        try:
-            # Run the scraping task
-            jobs = await asyncio.to_thread(
-                lambda: asyncio.run(scrape_source(source_info, user_settings[user_id]["min_price"]))
-            )
-            all_jobs.extend(jobs)                                                                       # Add the jobs to the list
-        except Exception as e:
-            logger.error(f"Error scraping {source_info['name']}: {e}")
-
-    return all_jobs
-
-# Asynchronous function for analyzing jobs with AI
-async def analyze_jobs_with_ai(jobs: List[Dict[str, Any]], skills: List[str], message: Message) -> None:
-    """Analyze jobs with AI"""
-    relevant_jobs = []
-
-    for job in jobs:
-        try:
-            # Langchain AI analysis
-            response = await asyncio.to_thread(
-                relevance_chain.run,
-                skills=", ".join(skills),                                                   # Set the skills
-                title=job["title"],                                                         # Set the title
-                description=job["description"],                                             # Set the description
-                price=job["price"]                                                          # Set the price
-            )
-
-            # Analyze the response
-            relevance_score = 0
-            relevance_reason = "No reason"
-
-            for line in response.split("\n"):                                               # Iterate over the response lines
-                if line.startswith("Relevance:"):                                           # Check if the line contains the relevance score
-                    try:
-                        relevance_score = int(re.search(r'\d+', line).group())      # Extract the relevance score
-                    except:
-                        logger.error(f"Error extracting relevance score: {line}")
-                elif line.startswith("Reason:"):                                            # Check if the line contains the relevance reason
-                    relevance_reason = line.replace("Reason:", "").strip()                  # Extract the relevance reason
-
-            # If the relevance score is high, add the job to the relevant jobs list
-            if relevance_score >= 7:
-                job["relevance_score"] = relevance_score                                    # Set the relevance score
-                job["relevance_reason"] = relevance_reason                                  # Set the relevance reason
-                await message.answer(
-                    f"Relevant job found:\n{job['title']}\n{job['description']}\nPrice: {job['price']}\nURL: {job['url']}"
-                )
-            print(f"Relevant jobs count: {len(relevant_jobs)}")
-        except Exception as e:
-            logger.error(f"Error analyzing job with AI: {e}")
-        await asyncio.sleep(20)
-
-
-# Handler for text messages
-@dp.message()
-async def process_message(message: Message) -> None:
-    """Text message handler"""
-    user_id = message.from_user.id                                              # Get user ID
-
-    if user_id not in ALLOWED_USERS:                                            # Check if user is allowed
-        return
-
-    text = message.text                                                         # Get the message text
-
-    # Check if the message is a search query
-    if re.match(r'^поиск\s+.+', text, re.IGNORECASE):
-        query = text.split(None, 1)[1]                              # Extract the search query
-
-        await message.answer(f"Searched query: {query}")                        # Send a message with the search query
-
-        # Imitate a delay
-        await asyncio.sleep(2)
-
-        # Use LangChain to extract skills
-        try:
-            skills = await asyncio.to_thread(
-                skills_chain.run,                                               # Run the skills extraction chain
-                query=query                                                     # Set the query
-            )
-
-            await message.answer(
-                f"Suggested skills: {', '.join(skills)}\n"
-                f"Use the /skills command to set the skills"
-            )
-        except Exception as e:
-            logger.error(f"Error getting skills from AI: {e}")
-            await message.answer("Sorry, I couldn't extract skills from the query")
-
-# Asynchronous function for the main bot loop
-async def main() -> None:
-    """Run the bot"""
-    # Asynchronous bot start
-    await dp.start_polling(bot)
-
-if __name__ == "__main__":
-    try:
-        # Run the main function
-        asyncio.run(main())
-    except (KeyboardInterrupt, SystemExit):
-        logger.info("Bot stopped")
\ No newline at end of file
+import asyncio
+import copy
+import logging
+import os
+import re
+import time
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
+from aiogram import Bot, Dispatcher, types
+from aiogram.filters import Command
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+import random
+from urllib.parse import urlsplit
+from config import load_config
+from lazy import Lazy
+from http_fetcher import USER_AGENT, HttpFetcher
+from dedup import NearDuplicateIndex, job_signature
+from job import Job
+from job_cache import SourceJobCache
+from scheduler import SearchScheduler
+from storage import JobStore
+from relevance_cache import RelevanceCache, relevance_key
+from model_client import ModelClient
+from delivery import DeliveryQueue
+from scoring import build_batches, estimate_tokens, format_batch, job_prompt_tokens, parse_batch_response, prompt_fields
+from pipeline import run_pipeline
+from prefilter import prescore_jobs, select_candidates
+from extraction import extract_jobs, get_page_url
+from metrics import REGISTRY, Tracer, start_metrics_server
+from source_health import SourceHealthTracker, is_transient
+
+# Logging setup
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO,
+    filename="bot.log"
+)
+logger = logging.getLogger(__name__)
+
+# Configuration
+TELEGRAM_TOKEN = "TELEGRAM_TOKEN"                            # Your Telegram token
+MODEL_API_KEY = "MODEL_API_KEY"                              # Model API key
+ALLOWED_USERS = ["ALLOWED_USERS"]                            # List of allowed users (Telegram user IDs)
+BROWSER_PATH  = "C:/Program Files/example.exe"  # Path to the browser executable
+BROWSER_POOL_SIZE = 2                                        # Number of warm browsers shared by all scrapes
+BROWSER_MAX_PAGES = 50                                       # Pages loaded before a browser is restarted
+BROWSER_MAX_MEMORY_MB = 1024                                 # Memory cap for a single browser in MB
+SCRAPE_MAX_WORKERS = 4                                       # Sources scraped at the same time
+SCRAPE_MAX_PER_DOMAIN = 1                                    # Sources of one domain scraped at the same time
+SCRAPE_MAX_PAGES = 10                                        # Deepest page crawled while every job on a page is new
+SCRAPE_PAGE_DELAY = (3, 7)                                   # Random pause between two pages of a source in seconds
+SCRAPE_RETRIES = 2                                           # Retries of a page after a timeout or connection error
+SCRAPE_RETRY_BACKOFF = 5                                     # Seconds before the first retry, doubled on every retry
+SOURCE_DEFAULT_TIMEOUT = 20                                  # Page wait timeout of a source until its latency is known
+SOURCE_MIN_TIMEOUT = 5                                       # Shortest page wait timeout derived from p95 latency
+SOURCE_MAX_TIMEOUT = 60                                      # Longest page wait timeout derived from p95 latency
+SOURCE_FAILURE_THRESHOLD = 3                                 # Failed scrapes in a row before a source is paused
+SOURCE_COOL_DOWN = 900                                       # Seconds a failing source is paused, doubled while it keeps failing
+DB_PATH = "bot.db"                                           # SQLite file with settings, jobs and seen jobs
+SEEN_RETENTION_DAYS = 30                                     # Days a seen job is remembered
+RELEVANCE_CACHE_SIZE = 10000                                 # Relevance scores kept in memory
+RELEVANCE_CACHE_TTL = 7 * 24 * 3600                          # Seconds a relevance score is reused
+RELEVANCE_CACHE_PATH = None                                  # SQLite file for relevance scores, None uses DB_PATH, "" keeps them in memory only
+RELEVANCE_BATCH_SIZE = 10                                    # Jobs scored in one model call
+RELEVANCE_BATCH_TOKENS = 3000                                # Estimated prompt tokens of the jobs in one model call
+PROMPT_FIELD_TOKENS = {"title": 30, "description": 250, "price": 15}  # Most tokens of each job field sent to the model
+DUPLICATE_MIN_SIMILARITY = 0.7                               # Estimated word-pair overlap of two copies of one job
+DUPLICATE_INDEX_SIZE = 10000                                 # Jobs per user compared against new jobs
+PRESCORE_THRESHOLD = 0.0                                     # Local pre-score a job must exceed to be sent to the model
+PRESCORE_MAX_CANDIDATES = 50                                 # Jobs per pass sent to the model, best pre-scores first
+DEFERRED_MAX_JOBS = 500                                      # Jobs per user over the candidate limit kept for the next pass
+PIPELINE_QUEUE_SIZE = 20                                     # Jobs waiting between two pipeline stages
+PIPELINE_SCORING_WORKERS = 2                                 # Concurrent scoring workers of a search
+MODEL_MAX_CONCURRENCY = 4                                    # Model calls in flight at the same time
+MODEL_REQUESTS_PER_MINUTE = 60                               # Model calls started per minute, set to your quota
+MODEL_TOKENS_PER_MINUTE = 100000                             # Estimated model tokens per minute, set to your quota
+MODEL_TIMEOUT = 120                                          # Seconds before a model call is retried
+MODEL_OUTPUT_TOKENS = 60                                     # Estimated answer tokens per scored job
+TELEGRAM_MESSAGES_PER_SECOND = 25                            # Notifications sent per second by the whole bot
+TELEGRAM_CHAT_INTERVAL = 1.0                                 # Seconds between notifications to one chat
+DIGEST_INTERVAL = 0                                          # Seconds matches are collected into one digest, 0 sends each match at once
+SEARCH_JITTER = 30                                           # Maximum random delay of a scheduled search in seconds
+SOURCE_CACHE_TTL = 300                                       # Seconds scraped jobs are shared before a source is scraped again
+FETCH_MODE = "browser"                                       # "browser" renders pages in Chrome, "http" fetches static HTML
+EXTRACT_MODE = "snapshot"                                    # "snapshot" parses page_source once, "webdriver" queries every field
+WORKER_MODE = False                                          # Scrape and parse in worker processes instead of the bot process
+SCRAPE_PROCESSES = None                                      # Worker processes in worker mode, None uses one per CPU core
+METRICS_HOST = "127.0.0.1"                                   # Address of the /metrics endpoint
+METRICS_PORT = None                                          # Port of the /metrics endpoint (e.g. 9108), None disables it
+TRACE_CYCLES = False                                         # Record trace spans of every search cycle
+
+# List of freelance sources
+FREELANCE_SOURCES = {
+    "Example_name.com": {
+        "name": "Example_name.com",
+        "url": "https://www.example_name/projects/",
+        "selector": "div.b-post",
+        "title_selector": "a.b-post__link",
+        "description_selector": "div.b-post__body",
+        "price_selector": "div.b-post__price",
+        "date_selector": "div.b-post__foot",
+        "fetch_mode": "browser",                    # Optional, overrides FETCH_MODE
+        "max_pages": 10,                            # Optional, overrides SCRAPE_MAX_PAGES
+        "extract_mode": "snapshot",                 # Optional, overrides EXTRACT_MODE
+    },
+}
+
+# Synonyms added to a skill for local pre-ranking(Example synonyms, keys in lowercase)
+SKILL_SYNONYMS = {
+    "python": ["django", "flask", "fastapi", "aiogram"],
+    "javascript": ["js", "node", "react", "vue"],
+    "ai": ["llm", "gpt", "langchain", "ml", "нейросеть"],
+    "parsing": ["scraping", "parser", "selenium", "парсинг", "парсер"],
+}
+
+# Settings from the JSON file in BOT_CONFIG (default config.json), then from environment variables of the same name
+globals().update(load_config(globals(), os.environ.get("BOT_CONFIG", "config.json")))
+
+# Persistent store for settings, jobs and seen jobs, the SQLite file is opened on first use
+job_store = Lazy(lambda: JobStore(DB_PATH))
+
+# Cache of relevance scores shared by all users
+relevance_cache = Lazy(lambda: RelevanceCache(
+    RELEVANCE_CACHE_SIZE,
+    RELEVANCE_CACHE_TTL,
+    DB_PATH if RELEVANCE_CACHE_PATH is None else RELEVANCE_CACHE_PATH       # Resolved after the settings are loaded
+))
+
+# Async client shared by all model calls, with concurrency and rate limits
+model_client = ModelClient(MODEL_MAX_CONCURRENCY, MODEL_REQUESTS_PER_MINUTE, MODEL_TOKENS_PER_MINUTE, timeout=MODEL_TIMEOUT)
+
+# User settings
+user_settings = {}
+
+# Jobs queued for every user, new near-duplicates of them are merged instead of scored
+duplicate_indexes: Dict[int, NearDuplicateIndex] = {}
+
+# Jobs of every user that passed the pre-ranking over the candidate limit, queued first in the next pass
+deferred_jobs: Dict[int, Dict[str, Job]] = {}
+
+# Heavy components are created on first use or by the background warm-up, so the bot starts answering at once
+def create_llm():
+    """Initialize LangChain model or some other model"""
+    from langchain_deepseek import ChatDeepSeek
+
+    return ChatDeepSeek(
+        model="model_name",                         # Your model name
+        temperature=0,
+        max_tokens=None,
+        timeout=None,
+        max_retries=0,                              # Retries and backoff are handled by ModelClient
+        api_key=MODEL_API_KEY
+    )
+
+def create_chain(template: str):
+    """LangChain instance running a prompt template on the model"""
+    from langchain.chains import LLMChain
+    from langchain.prompts import PromptTemplate
+
+    return LLMChain(llm=llm.get(), prompt=PromptTemplate.from_template(template))
+
+def create_browser_pool():
+    """Pool of headless browsers reused across sources and users"""
+    from browser_pool import BrowserPool, chrome_factory
+
+    return BrowserPool(
+        chrome_factory(BROWSER_PATH),
+        size=BROWSER_POOL_SIZE,
+        max_pages=BROWSER_MAX_PAGES,
+        max_memory_mb=BROWSER_MAX_MEMORY_MB
+    )
+
+def create_scrape_workers():
+    """Worker processes with their own browsers, used in worker mode"""
+    from workers import ScrapeWorkers
+
+    return ScrapeWorkers(
+        SCRAPE_PROCESSES,
+        BROWSER_PATH,
+        max_pages=BROWSER_MAX_PAGES,
+        max_memory_mb=BROWSER_MAX_MEMORY_MB,
+        log_file="bot.log"
+    )
+
+llm = Lazy(create_llm)
+browser_pool = Lazy(create_browser_pool)
+scrape_workers = Lazy(create_scrape_workers)
+
+# Keep-alive HTTP client for sources that don't need JavaScript
+http_fetcher = HttpFetcher(USER_AGENT)
+
+# Jobs scraped once per cycle and shared by all users
+source_job_cache = SourceJobCache(SOURCE_CACHE_TTL)
+
+# Latency and failures of every source, for adaptive timeouts and pausing failing sources
+source_health = SourceHealthTracker(
+    default_timeout=SOURCE_DEFAULT_TIMEOUT,
+    min_timeout=SOURCE_MIN_TIMEOUT,
+    max_timeout=SOURCE_MAX_TIMEOUT,
+    failure_threshold=SOURCE_FAILURE_THRESHOLD,
+    cool_down=SOURCE_COOL_DOWN
+)
+
+# Concurrency limits for scraping
+scrape_semaphore = asyncio.Semaphore(SCRAPE_MAX_WORKERS)                    # Global limit
+domain_semaphores: Dict[str, asyncio.Semaphore] = {}                         # Limits per domain
+
+# Metrics of the search stages, served on /metrics
+PAGE_FETCH_SECONDS = REGISTRY.histogram("page_fetch_seconds", "Time to load a listing page, browser pages include parsing", ["source"])
+SCRAPE_RETRY_COUNT = REGISTRY.counter("scrape_retries_total", "Page loads retried after a transient error", ["source"])
+SOURCES_SKIPPED = REGISTRY.counter("sources_skipped_total", "Scrapes skipped while a source is paused", ["source"])
+JOBS_EXTRACTED = REGISTRY.counter("jobs_extracted_total", "Jobs extracted from listing pages", ["source"])
+JOBS_FILTERED = REGISTRY.counter("jobs_filtered_total", "Jobs dropped before the model", ["reason"])
+RELEVANCE_SCORES = REGISTRY.histogram("relevance_score", "Relevance scores of analyzed jobs", buckets=range(11))
+
+# Per-cycle trace spans, logged and served on /traces when enabled
+tracer = Tracer(TRACE_CYCLES)
+
+# LangChain prompts for relevance analysis and skills extraction(Example prompts)
+relevance_template = """
+        Please analyze this freelance job and determine how well it matches the following skills: {skills}.
+        Give the shortest possible answer, no more than 1 sentence.
+        Job:
+        Title: {title}
+        Description: {description}
+        Budget: {price}
+        
+        Give a relevance score from 0 to 10, where 10 is a perfect match for the skills, and explain your score.
+        Return the answer in the format:
+        Relevance: [score]
+        Reason: [explanation]
+        """
+
+# Bump when the relevance prompt changes, so cached scores are not reused
+RELEVANCE_PROMPT_VERSION = 2
+
+# Batch relevance prompt, scores several jobs in one call(Example prompt)
+batch_relevance_template = """
+        Please analyze these freelance jobs and determine how well each one matches the following skills: {skills}.
+        Jobs:
+        {jobs}
+
+        Give every job a relevance score from 0 to 10, where 10 is a perfect match for the skills, and explain each score in no more than 1 sentence.
+        Return only a JSON array with one object per job, using the job number in square brackets as id:
+        [{{"id": 1, "relevance": 0, "reason": "explanation"}}]
+        """
+
+# Skills extraction prompt(Example prompt)
+skills_template = """
+        The user is looking for freelance jobs with the query: "{query}"
+        List 3-5 key skills that may be related to this query.
+        Give a very short answer in the form of a list of skills, no more than 1 sentence.
+        """
+
+# LangChain instances for relevance analysis and skills extraction
+relevance_chain = Lazy(lambda: create_chain(relevance_template))
+batch_relevance_chain = Lazy(lambda: create_chain(batch_relevance_template))
+skills_chain = Lazy(lambda: create_chain(skills_template))
+
+# Dispatcher and bot initialization, the bot is created when polling starts
+bot = Lazy(lambda: Bot(token=TELEGRAM_TOKEN))
+dp = Dispatcher()
+
+# Outbound queue for job notifications
+delivery_queue = Lazy(lambda: DeliveryQueue(
+    bot.get(),
+    messages_per_second=TELEGRAM_MESSAGES_PER_SECOND,
+    chat_interval=TELEGRAM_CHAT_INTERVAL,
+    digest_interval=DIGEST_INTERVAL
+))
+
+# Handlers for commands
+@dp.message(Command("start"))
+async def start_handler(message: Message) -> None:
+    """Start command handler"""
+    user_id = message.from_user.id
+
+    if user_id not in ALLOWED_USERS:
+        await message.answer("I'm sorry, you are not allowed to use this bot.")
+        return
+
+    # Initialize user settings if not present
+    if user_id not in user_settings:
+        user_settings[user_id] = {
+            "skills": [],                               # User skills
+            "sources": list(FREELANCE_SOURCES.keys()),  # Selected sources
+            "min_price": 0,                             # Minimum price
+            "notification_interval": 30,                # Notification interval in minutes
+            "last_jobs": set(),                         # Last found jobs
+            "task_running": False,                      # Task status
+            "chat_id": message.chat.id                  # Chat for notifications
+        }
+        job_store.get().save_user(user_id, user_settings[user_id])
+
+    # Send welcome message(You can customize this message, to example: add a list of available commands)
+    await message.answer(
+        "Hello! I am a bot for finding freelance jobs. "
+        "Use the following commands:\n"
+        "/skills - set key skills\n"
+        "/sources - select sources for search\n"
+        "/price - set minimum price\n"
+        "/interval - set notification interval\n"
+        "/start_search - start job search\n"
+        "/stop_search - stop job search"
+    )
+
+# Handlers for setting user skills, sources, minimum price, and notification interval
+@dp.message(Command("skills"))
+async def set_skills_handler(message: Message) -> None:
+    """Skills command handler"""
+    user_id = message.from_user.id                                          # Get user ID
+
+    if user_id not in ALLOWED_USERS:                                        # Check if user is allowed
+        return
+
+    command_args = message.text.split(maxsplit=1)                           # Split the message text
+    if len(command_args) < 2:                                               # Check if the message contains skills
+        await message.answer(
+            "Create a list of skills separated by commas. For example: /skills Python, Django, Flask, AI"
+        )
+        return
+
+    skills = [skill.strip() for skill in command_args[1].split(",")]        # Extract skills from the message
+    user_settings[user_id]["skills"] = skills                               # Set user skills
+    job_store.get().save_user(user_id, user_settings[user_id])              # Save the settings
+
+    await message.answer(f"Succesfully set skills: {', '.join(skills)}")    # Send a confirmation message
+
+# Handler for setting sources
+@dp.message(Command("sources"))
+async def set_sources_handler(message: Message) -> None:
+    """Sources command handler"""
+    user_id = message.from_user.id                                      # Get user ID
+
+    if user_id not in ALLOWED_USERS:                                    # Check if user is allowed
+        return
+
+    builder = InlineKeyboardBuilder()
+    for source_id, source_info in FREELANCE_SOURCES.items():            # Create a list of sources
+        is_selected = source_id in user_settings[user_id]["sources"]    # Check if the source is selected
+        status = "✅" if is_selected else "❌"                          # Set the status
+        builder.add(InlineKeyboardButton(
+            text=f"{source_info['name']} {status}",                     # Add a button for the source
+            callback_data=f"source_{source_id}"                         # Set the callback data
+        ))
+
+    builder.add(InlineKeyboardButton(
+        text="Finish",                                                  # Add a button to finish the selection
+        callback_data="sources_done"                                    # Set the callback data
+    ))
+    builder.adjust(1)                                                   # Adjust the buttons layout
+
+    await message.answer(
+        "Choose sources for search:",                              # Send a message to choose sources
+        reply_markup=builder.as_markup()                                # Add the keyboard
+    )
+
+# Handler for setting the minimum price
+@dp.message(Command("price"))
+async def set_min_price_handler(message: Message) -> None:
+    """/price command handler"""
+    user_id = message.from_user.id                                                  # Get user ID
+
+    if user_id not in ALLOWED_USERS:                                                # Check if user is allowed
+        return
+
+    command_args = message.text.split(maxsplit=1)                                   # Split the message text
+    if len(command_args) < 2 or not command_args[1].isdigit():                      # Check if the message contains the price
+        await message.answer("Choose the minimum price. For example: /price 30")    # Send a message to set the price
+        return
+
+    min_price = int(command_args[1])                                                # Extract the price from the message
+    user_settings[user_id]["min_price"] = min_price                                 # Set the minimum price
+    job_store.get().save_user(user_id, user_settings[user_id])                      # Save the settings
+
+    await message.answer(f"Mimimum price set: {min_price}")                         # Send a confirmation message
+
+# Handler for setting the notification interval
+@dp.message(Command("interval"))
+async def set_interval_handler(message: Message) -> None:
+    """/interval command handler"""
+    user_id = message.from_user.id                                                          # Get user ID
+
+    if user_id not in ALLOWED_USERS:                                                        # Check if user is allowed
+        return
+
+    command_args = message.text.split(maxsplit=1)                                           # Split the message text
+    if len(command_args) < 2 or not command_args[1].isdigit():                              # Check if the message contains the interval
+        await message.answer("Set the notification interval. For example: /interval 30")    # Send a message to set the interval
+        return
+
+    interval = int(command_args[1])                                                         # Extract the interval from the message
+    if interval < 5:                                                                        # Check if the interval is at least 5 minutes
+        await message.answer("Interval should be at least 5 minutes")
+        return
+
+    user_settings[user_id]["notification_interval"] = interval                              # Set the notification interval
+    job_store.get().save_user(user_id, user_settings[user_id])                              # Save the settings
+
+    await message.answer(f"Inverval set: {interval} minutes")
+
+# Handler for button clicks
+@dp.callback_query()
+async def button_callback_handler(callback: types.CallbackQuery) -> None:
+    """Button click handler"""
+    user_id = callback.from_user.id                                         # Get user ID
+
+    if user_id not in ALLOWED_USERS:                                        # Check if user is allowed
+        await callback.answer()                                             # Send a response
+        return
+
+    data = callback.data                                                    # Get the callback data
+
+    if data.startswith("source_"):                                          # Check if the data is for a source
+        source_id = data.replace("source_", "")                 # Extract the source ID
+        if source_id in user_settings[user_id]["sources"]:                  # Check if the source is selected
+            user_settings[user_id]["sources"].remove(source_id)             # Remove the source
+        else:
+            user_settings[user_id]["sources"].append(source_id)             # Add the source
+        job_store.get().save_user(user_id, user_settings[user_id])          # Save the settings
+
+        # Create a keyboard with sources
+        builder = InlineKeyboardBuilder()
+        for src_id, source_info in FREELANCE_SOURCES.items():               # Create a list of sources
+            is_selected = src_id in user_settings[user_id]["sources"]       # Check if the source is selected
+            status = "✅" if is_selected else "❌"                          # Set the status
+            builder.add(InlineKeyboardButton(
+                text=f"{source_info['name']} {status}",                     # Add a button for the source
+                callback_data=f"source_{src_id}"                            # Set the callback data
+            ))
+
+        builder.add(InlineKeyboardButton(
+            text="Finish",                                                  # Add a button to finish the selection
+            callback_data="sources_done"                                    # Set the callback data
+        ))
+        builder.adjust(1)                                                   # Adjust the buttons layout
+
+        await callback.message.edit_text(                                   # Edit the message
+            "Select sources for search:",
+            reply_markup=builder.as_markup()                                # Add the keyboard
+        )
+
+    elif data == "sources_done":                                            # Check if the data is for finishing the selection
+        selected_sources = [FREELANCE_SOURCES[s]["name"] for s in user_settings[user_id]["sources"]]    # Get the selected sources
+        await callback.message.edit_text(f"Succesfully set sources: {', '.join(selected_sources)}")     # Send a confirmation message
+    await callback.answer()                                                                             # Send a response
+
+# Handler for starting the search
+@dp.message(Command("start_search"))
+async def start_search_handler(message: Message) -> None:
+    """/start_search command handler"""
+    user_id = message.from_user.id                                                      # Get user ID
+
+    if user_id not in ALLOWED_USERS:                                                    # Check if user is allowed
+        return
+
+
+    # Initialize user settings if not present
+    if user_id not in user_settings:
+        user_settings[user_id] = {
+            "skills": [],                                                               # User skills
+            "sources": list(FREELANCE_SOURCES.keys()),                                  # Selected sources
+            "min_price": 0,                                                             # Minimum price
+            "notification_interval": 30,                                                # Notification interval in minutes
+            "last_jobs": set(),                                                         # Last found jobs
+            "task_running": False,                                                      # Task status
+            "chat_id": message.chat.id                                                  # Chat for notifications
+        }
+        job_store.get().save_user(user_id, user_settings[user_id])
+
+    if not user_settings[user_id]["skills"]:                                            # Check if the user has set skills
+        await message.answer("First set the skills using the /skills command")          # Send a message to set the skills
+        return
+
+    if search_scheduler.is_running(user_id):                                            # Check if the search is already running
+        await message.answer("Search is already running")                               # Send a message
+        return
+
+    user_settings[user_id]["task_running"] = True                                       # Set the task status to running
+    user_settings[user_id]["chat_id"] = message.chat.id                                 # Send notifications to this chat
+    job_store.get().save_user(user_id, user_settings[user_id])                          # Save the settings
+
+    await message.answer(                                                               # Send a message
+        f"Succesfully started search with the following settings:\n"
+        f"Searched skills: {', '.join(user_settings[user_id]['skills'])}\n"
+        f"Mimimum price: {user_settings[user_id]['min_price']}\n"
+        f"Inverval: {user_settings[user_id]['notification_interval']} minutes"
+    )
+
+    # Run the search in the background on the user's interval
+    search_scheduler.start(user_id)
+
+# Handler for stopping the search
+@dp.message(Command("stop_search"))
+async def stop_search_handler(message: Message) -> None:
+    """/stop_search command handler"""
+    user_id = message.from_user.id                      # Get user ID
+
+    if user_id not in ALLOWED_USERS:                    # Check if user is allowed
+        return
+
+    if not search_scheduler.stop(user_id):              # Cancel the search task if it is running
+        await message.answer("Search is not running")   # Send a message
+        return
+
+    user_settings[user_id]["task_running"] = False      # Set the task status to not running
+    job_store.get().save_user(user_id, user_settings[user_id])  # Save the settings
+    await message.answer("Search stopped")              # Send a message
+
+# Blocking call in a thread that keeps its leased browser until it returns
+async def to_thread_uninterrupted(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking function in a thread, letting it finish if the caller is cancelled"""
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        # The browser must not go back to the pool while the thread still uses it
+        await asyncio.wait([future])
+        raise
+
+# Incremental crawling: go to the next page only while every job is new
+def crawl_deeper(source_info: Dict[str, str], page: int, page_jobs: List[Job]) -> bool:
+    """Check if the page after this one may still hold unseen jobs"""
+    if not page_jobs:
+        return False
+    keys = {job.key for job in page_jobs}
+    new_count = len(keys - job_store.get().known_keys(keys))                # Jobs never scraped before
+    logger.info(f"{source_info['name']} page {page}: {new_count} of {len(keys)} jobs are new")
+    return new_count == len(keys)
+
+# Page loads with the adaptive timeout of the source, retrying transient errors
+async def load_page(source_info: Dict[str, str], page: int, load: Callable[[float], Awaitable[Any]]) -> Any:
+    """Run load with the timeout derived from the latency of the source, retrying transient errors with backoff"""
+    name = source_info["name"]
+    attempt = 0
+    while True:
+        timeout = source_health.timeout(name)
+        started = time.monotonic()
+        try:
+            with PAGE_FETCH_SECONDS.time(source=name), tracer.span("fetch", source=name, page=page):
+                result = await load(timeout)
+            source_health.record_latency(name, time.monotonic() - started)
+            return result
+        except Exception as e:
+            # Timed-out attempts count as the timeout, so the retry backoff never inflates the p95
+            source_health.record_latency(name, min(time.monotonic() - started, timeout))
+            if attempt >= SCRAPE_RETRIES or not is_transient(e):
+                raise
+            attempt += 1
+            delay = SCRAPE_RETRY_BACKOFF * 2 ** (attempt - 1)
+            SCRAPE_RETRY_COUNT.inc(source=name)
+            logger.warning(f"{name} page {page} failed ({type(e).__name__}: {e}), retry {attempt} in {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+async def scrape_source_http(source_info: Dict[str, str], min_price: int) -> AsyncIterator[List[Job]]:
+    """Yield jobs from a single static source over HTTP, page by page"""
+    # Iterate over pages, newest first
+    for page in range(1, source_info.get("max_pages", SCRAPE_MAX_PAGES) + 1):
+        page_url = get_page_url(source_info, page)
+        page_html = await load_page(                                        # Last copy if the page has not changed
+            source_info, page, lambda timeout: http_fetcher.fetch(page_url, timeout=timeout)
+        )
+
+        with tracer.span("extract", source=source_info["name"], page=page):
+            if WORKER_MODE:
+                workers = await scrape_workers.aget()
+                page_jobs = await workers.extract_jobs(page_html, page_url, source_info, page, min_price)
+            else:
+                page_jobs = extract_jobs(page_html, page_url, source_info, page, min_price)
+        deeper = crawl_deeper(source_info, page, page_jobs)                 # Check before the jobs are stored
+        yield page_jobs
+        if not deeper:
+            break
+
+        # Wait for a random time
+        await asyncio.sleep(random.uniform(*SCRAPE_PAGE_DELAY))
+
+async def scrape_source_workers(source_info: Dict[str, str], min_price: int) -> AsyncIterator[List[Job]]:
+    """Yield jobs from a single source scraped by worker processes with their own browsers"""
+    extract_mode = source_info.get("extract_mode", EXTRACT_MODE)
+    workers = await scrape_workers.aget()
+
+    # Iterate over pages, newest first
+    for page in range(1, source_info.get("max_pages", SCRAPE_MAX_PAGES) + 1):
+        page_jobs = await load_page(
+            source_info, page, lambda timeout: workers.scrape_page(source_info, page, min_price, timeout, extract_mode)
+        )
+        deeper = crawl_deeper(source_info, page, page_jobs)                 # Check before the jobs are stored
+        yield page_jobs
+        if not deeper:
+            break
+
+        # Wait for a random time
+        await asyncio.sleep(random.uniform(*SCRAPE_PAGE_DELAY))
+
+async def scrape_source_browser(source_info: Dict[str, str], min_price: int) -> AsyncIterator[List[Job]]:
+    """Yield jobs from a single source rendered in a pooled browser"""
+    from scraper import scrape_page                                         # Loads Selenium on first use
+
+    extract_mode = source_info.get("extract_mode", EXTRACT_MODE)
+
+    # Lease a warm browser from the pool
+    pool = await browser_pool.aget()
+    async with pool.lease() as driver:
+        # Iterate over pages, newest first
+        for page in range(1, source_info.get("max_pages", SCRAPE_MAX_PAGES) + 1):
+            # Blocking Selenium calls run in a worker thread
+            page_jobs = await load_page(
+                source_info, page,
+                lambda timeout: to_thread_uninterrupted(scrape_page, driver, source_info, page, min_price, timeout, extract_mode)
+            )
+            deeper = crawl_deeper(source_info, page, page_jobs)             # Check before the jobs are stored
+            yield page_jobs
+            if not deeper:
+                break
+
+            # Wait for a random time
+            await asyncio.sleep(random.uniform(*SCRAPE_PAGE_DELAY))
+
+async def scrape_source_pages(source_info: Dict[str, str], min_price: int) -> AsyncIterator[List[Job]]:
+    """Yield jobs from a single source, page by page, skipping it while it keeps failing"""
+    name = source_info["name"]
+    if not source_health.allow(name):
+        logger.info(f"Skipping {name} after repeated failures, next try in {source_health.retry_in(name):.0f}s")
+        SOURCES_SKIPPED.inc(source=name)
+        return
+
+    if source_info.get("fetch_mode", FETCH_MODE) == "http":
+        pages = scrape_source_http(source_info, min_price)                 # Static sources don't need a browser
+    elif WORKER_MODE:
+        pages = scrape_source_workers(source_info, min_price)
+    else:
+        pages = scrape_source_browser(source_info, min_price)
+
+    try:
+        async for page_jobs in pages:
+            yield page_jobs
+    except Exception as e:
+        source_health.record_failure(name)
+        logger.error(f"Error scraping {name}: {e}")
+    else:
+        source_health.record_success(name)
+
+async def scrape_source(source_info: Dict[str, str], min_price: int) -> List[Job]:
+    """Parse jobs from a single source"""
+    jobs = []
+    async for page_jobs in scrape_source_pages(source_info, min_price):
+        jobs.extend(page_jobs)
+    return jobs
+
+# Semaphore for the domain of a source, created on first use
+def get_domain_semaphore(url: str) -> asyncio.Semaphore:
+    """Get the concurrency limit for the domain of a URL"""
+    domain = urlsplit(url).netloc.lower()
+    if domain not in domain_semaphores:
+        domain_semaphores[domain] = asyncio.Semaphore(SCRAPE_MAX_PER_DOMAIN)
+    return domain_semaphores[domain]
+
+# Asynchronous generator for scraping a source under the global and per-domain limits
+async def scrape_source_limited(source_id: str) -> AsyncIterator[List[Job]]:
+    """Yield jobs from a single source within the concurrency limits, storing every page"""
+    source_info = FREELANCE_SOURCES[source_id]
+    async with scrape_semaphore, get_domain_semaphore(source_info["url"]):
+        async for page_jobs in scrape_source_pages(source_info, 0):                # No price filter, jobs are shared
+            JOBS_EXTRACTED.inc(len(page_jobs), source=source_info["name"])
+            job_store.get().save_jobs(page_jobs)                                    # Keep the scraped jobs
+            yield page_jobs
+
+# Central fetch stage: every source is scraped once per cycle for all users
+def stream_source(source_id: str) -> AsyncIterator[List[Job]]:
+    """Yield the jobs of a source page by page from the shared cache, scraping it if stale"""
+    return source_job_cache.stream(source_id, lambda: scrape_source_limited(source_id))
+
+# Per-user filters applied in memory to the shared jobs
+def filter_jobs_for_user(jobs: List[Job], settings: Dict[str, Any]) -> List[Job]:
+    """Select the jobs matching the minimum price of a user"""
+    user_jobs = []
+    for job in jobs:
+        if job.price_max < settings["min_price"]:                                                       # Pass cheap jobs
+            continue
+        user_jobs.append(copy.copy(job))                                                                # Copy, the cached job is shared
+    JOBS_FILTERED.inc(len(jobs) - len(user_jobs), reason="price")
+    return user_jobs
+
+# Parse the answer of the relevance chain
+def parse_relevance(response: str) -> Tuple[int, str]:
+    """Extract the relevance score and reason from a model answer"""
+    relevance_score = 0
+    relevance_reason = "No reason"
+
+    for line in response.split("\n"):                                                   # Iterate over the response lines
+        line = line.strip()
+        if line.startswith("Relevance:"):                                               # Check if the line contains the relevance score
+            try:
+                relevance_score = int(re.search(r'\d+', line).group())                  # Extract the relevance score
+            except:
+                logger.error(f"Error extracting relevance score: {line}")
+        elif line.startswith("Reason:"):                                                # Check if the line contains the relevance reason
+            relevance_reason = line.replace("Reason:", "").strip()                      # Extract the relevance reason
+
+    return relevance_score, relevance_reason
+
+# Estimated tokens of a model call, used by the tokens-per-minute limit
+def estimate_call_tokens(template: str, job_count: int, inputs: Dict[str, str]) -> int:
+    """Estimate prompt and answer tokens of a relevance call"""
+    return estimate_tokens(template.format(**inputs)) + MODEL_OUTPUT_TOKENS * job_count
+
+# Asynchronous function for scoring a single job with the model
+async def score_job(job: Job, skills: List[str]) -> Tuple[int, str]:
+    """Score a job against skills with a single-job prompt"""
+    inputs = {
+        "skills": ", ".join(skills),                                                    # Set the skills
+        **prompt_fields(job, PROMPT_FIELD_TOKENS)                                       # Set the trimmed title, description and price
+    }
+
+    # Langchain AI analysis
+    with tracer.span("model", jobs=1):
+        response = await model_client.run(
+            await relevance_chain.aget(), estimate_call_tokens(relevance_template, 1, inputs), **inputs
+        )
+    return parse_relevance(response)
+
+# Asynchronous function for scoring a batch of jobs with one model call
+async def score_batch(batch: List[Job], skills: List[str]) -> Dict[int, Tuple[int, str]]:
+    """Score several jobs in one prompt, returns results by position in the batch"""
+    if len(batch) == 1:
+        try:
+            return {0: await score_job(batch[0], skills)}
+        except Exception as e:
+            logger.error(f"Error analyzing job with AI: {e}")                           # Left unseen, retried next pass
+            return {}
+
+    results = {}
+    try:
+        inputs = {
+            "skills": ", ".join(skills),                                                # Set the skills
+            "jobs": format_batch(batch, PROMPT_FIELD_TOKENS)                            # Set the numbered jobs
+        }
+        with tracer.span("model", jobs=len(batch)):
+            response = await model_client.run(
+                await batch_relevance_chain.aget(), estimate_call_tokens(batch_relevance_template, len(batch), inputs), **inputs
+            )
+        results = {number - 1: result for number, result in parse_batch_response(response, len(batch)).items()}
+    except Exception as e:
+        logger.error(f"Error scoring batch with AI: {e}")
+
+    # Jobs missing from the answer are scored one by one
+    for index, job in enumerate(batch):
+        if index not in results:
+            logger.warning(f"No batch result for job, scoring it alone: {job.title}")
+            try:
+                results[index] = await score_job(job, skills)
+            except Exception as e:
+                logger.error(f"Error analyzing job with AI: {e}")
+
+    return results
+
+# Asynchronous generator for scoring jobs, using the relevance cache when possible
+async def score_jobs(jobs: List[Job], skills: List[str]) -> AsyncIterator[Tuple[Job, int, str]]:
+    """Yield (job, score, reason) for every job that could be scored"""
+    pending = []
+    for job in jobs:
+        job.cache_key = relevance_key(job.title, job.description, job.price, skills, RELEVANCE_PROMPT_VERSION)
+        cached = relevance_cache.get().get(job.cache_key)
+        if cached is not None:                                                          # Cached scores cost no model call
+            yield job, cached[0], cached[1]
+        else:
+            pending.append(job)
+
+    for batch in build_batches(pending, RELEVANCE_BATCH_SIZE, RELEVANCE_BATCH_TOKENS, PROMPT_FIELD_TOKENS):
+        results = await score_batch(batch, skills)
+        for index, job in enumerate(batch):
+            if index in results:
+                relevance_score, relevance_reason = results[index]
+                relevance_cache.get().set(job.cache_key, relevance_score, relevance_reason)
+                yield job, relevance_score, relevance_reason
+
+# Near-duplicate merging of the new jobs of a user
+def mark_duplicates_seen(user_id: int, duplicates: List[Job]) -> None:
+    """Remember merged copies as seen, their cluster is scored once"""
+    for duplicate in duplicates:
+        user_settings[user_id]["last_jobs"].add(duplicate.key)
+        job_store.get().mark_seen(user_id, duplicate.key)
+
+def merge_duplicates(jobs: List[Job], user_id: int, clusters: Dict[str, Job]) -> List[Job]:
+    """Jobs that are not near-duplicates of each other or of a job queued before, first copies first"""
+    index = duplicate_indexes.setdefault(user_id, NearDuplicateIndex(DUPLICATE_MIN_SIMILARITY, DUPLICATE_INDEX_SIZE))
+    batch_index = NearDuplicateIndex(DUPLICATE_MIN_SIMILARITY, len(jobs))
+    unique = {}                                                                             # Key -> first copy in this batch
+    for job in jobs:
+        job.signature = job_signature(job.title, job.description)                           # Only new jobs pay for it
+
+        # Copy of a job queued before: join its cluster while it waits, otherwise it was already analyzed
+        match = index.find(job.signature)
+        if match is not None and match[0] != job.key:
+            cluster = clusters.get(match[0])
+            if cluster is not None:
+                cluster.duplicates += (job,)                                                # Listed when the cluster is delivered
+            mark_duplicates_seen(user_id, [job])
+            continue
+
+        # Copy of a job earlier in this batch, merged into it
+        match = batch_index.find(job.signature)
+        if match is not None:
+            unique[match[0]].duplicates += (job,)
+            continue
+        batch_index.add(job.key, job.signature)
+        unique[job.key] = job
+    return list(unique.values())
+
+# Jobs over the candidate limit, the next crawl stops before their pages so they are kept here
+def defer_jobs(user_id: int, jobs: List[Job]) -> None:
+    """Keep jobs and their merged copies for the next pass of a user, oldest dropped first"""
+    deferred = deferred_jobs.setdefault(user_id, {})
+    for job in jobs:
+        for posted in (job,) + job.duplicates:
+            posted.duplicates = ()                                                          # Merged again in the next pass
+            deferred[posted.key] = posted
+    while len(deferred) > DEFERRED_MAX_JOBS:
+        del deferred[next(iter(deferred))]
+
+# Pre-ranking of the new jobs of a user
+def select_new_jobs(jobs: List[Job], user_id: int, limit: int, clusters: Dict[str, Job]) -> List[Job]:
+    """Unseen jobs of a user that pass the near-duplicate check and the local pre-ranking, best first"""
+    skills = user_settings[user_id]["skills"]                                               # User skills
+    seen_jobs = user_settings[user_id]["last_jobs"]                                         # Jobs already analyzed
+
+    new_jobs = [job for job in jobs if job.key not in seen_jobs]                            # Skip jobs analyzed before
+    JOBS_FILTERED.inc(len(jobs) - len(new_jobs), reason="seen")
+    unique_jobs = merge_duplicates(new_jobs, user_id, clusters)                            # One job per cluster
+
+    # Cheap local pre-ranking, only the best candidates go to the model
+    with tracer.span("prescore", jobs=len(unique_jobs)):
+        prescores = prescore_jobs(unique_jobs, skills, SKILL_SYNONYMS)
+        ranked = select_candidates(unique_jobs, prescores, PRESCORE_THRESHOLD, len(unique_jobs))
+    candidates, over_limit = ranked[:limit], ranked[limit:]
+    JOBS_FILTERED.inc(len(new_jobs) - len(unique_jobs), reason="duplicate")
+    JOBS_FILTERED.inc(len(unique_jobs) - len(ranked), reason="prescore")
+    defer_jobs(user_id, [job for job, _ in over_limit])
+    for job, prescore in candidates:
+        job.prescore = prescore                                                             # Set the pre-score
+        duplicate_indexes[user_id].add(job.key, job.signature)                              # Later copies join its cluster
+        clusters[job.key] = job
+        mark_duplicates_seen(user_id, list(job.duplicates))
+    logger.info(
+        f"Pre-ranking kept {len(candidates)} of {len(new_jobs)} new jobs "
+        f"({len(new_jobs) - len(unique_jobs)} near-duplicates merged, {len(over_limit)} deferred) for user {user_id}"
+    )
+
+    return [job for job, _ in candidates]
+
+# Asynchronous function for delivering a scored job to a user
+async def deliver_result(user_id: int, job: Job, relevance_score: int, relevance_reason: str) -> None:
+    """Notify a user about a relevant job and remember it as seen"""
+    logger.info(f"Scores for {job.url or job.title}: pre-score {job.prescore:.2f}, relevance {relevance_score}")
+    RELEVANCE_SCORES.observe(relevance_score)
+
+    # Remember the job so it is never analyzed or sent again
+    user_settings[user_id]["last_jobs"].add(job.key)
+    job_store.get().mark_seen(user_id, job.key)
+
+    # If the relevance score is high, queue the job for the user
+    if relevance_score >= 7:
+        job.relevance_score = relevance_score                                               # Set the relevance score
+        job.relevance_reason = relevance_reason                                             # Set the relevance reason
+
+        async def mark_notified() -> None:
+            for notified_job in (job,) + job.duplicates:
+                job_store.get().mark_seen(user_id, notified_job.key, notified=True)
+
+        # Copies of the job posted elsewhere are listed in the same notification
+        urls = f"URL: {job.url}"
+        if job.duplicates:
+            urls = "URLs:\n" + "\n".join(f"{posted.url} ({posted.source}, {posted.price})" for posted in (job,) + job.duplicates)
+
+        delivery_queue.get().enqueue(
+            user_settings[user_id]["chat_id"],
+            f"Relevant job found:\n{job.title}\n{job.description}\nPrice: {job.price}\n{urls}",
+            on_sent=mark_notified,
+            digest=True
+        )
+
+# Asynchronous function for running jobs through the scoring and delivery stages
+async def run_user_pipeline(user_id: int, produce: Callable[[asyncio.Queue], Awaitable[None]]) -> None:
+    """Score the jobs put on the queue by produce and deliver them to a user"""
+    skills = user_settings[user_id]["skills"]
+
+    await run_pipeline(
+        produce,
+        lambda batch: score_jobs(batch, skills),
+        lambda result: deliver_result(user_id, *result),
+        queue_size=PIPELINE_QUEUE_SIZE,
+        workers=PIPELINE_SCORING_WORKERS,
+        batch_size=RELEVANCE_BATCH_SIZE,
+        token_budget=RELEVANCE_BATCH_TOKENS,
+        tokens_of=lambda job: job_prompt_tokens(job, PROMPT_FIELD_TOKENS)
+    )
+    logger.info(f"Relevance cache: {relevance_cache.get().stats()}")
+    logger.info(f"Model client: {model_client.stats()}")
+    logger.info(f"Source health: {source_health.stats()}")
+    queue = delivery_queue.get()
+    logger.info(f"Delivery queue: {queue.depth()} waiting, {queue.sent} sent, {queue.failed} failed")
+
+# Asynchronous function for analyzing jobs with AI
+async def analyze_jobs_with_ai(jobs: List[Job], user_id: int) -> None:
+    """Analyze jobs with AI"""
+    async def produce(job_queue: asyncio.Queue) -> None:
+        for job in select_new_jobs(jobs, user_id, PRESCORE_MAX_CANDIDATES, {}):
+            await job_queue.put(job)
+
+    await run_user_pipeline(user_id, produce)
+
+# Asynchronous function for one scheduled search pass of a user
+async def run_search(user_id: int) -> None:
+    """Stream jobs from all sources of a user through scoring to notifications"""
+    settings = user_settings[user_id]
+    remaining = [PRESCORE_MAX_CANDIDATES]                                               # Model candidates left in this pass
+    clusters: Dict[str, Job] = {}                                                       # Jobs queued in this pass, by key
+
+    async def produce_source(job_queue: asyncio.Queue, source_id: str) -> None:
+        async for page_jobs in stream_source(source_id):
+            user_jobs = [job for job in filter_jobs_for_user(page_jobs, settings) if job.key not in clusters]  # Per-user filters
+            candidates = select_new_jobs(user_jobs, user_id, remaining[0], clusters)
+            remaining[0] -= len(candidates)
+            for job in candidates:
+                await job_queue.put(job)                                                # Waits while the scorers are busy
+
+    async def produce(job_queue: asyncio.Queue) -> None:
+        # Jobs left over by the last pass first, from sources the user still follows
+        names = {FREELANCE_SOURCES[source_id]["name"] for source_id in settings["sources"]}
+        deferred = [job for job in deferred_jobs.pop(user_id, {}).values() if job.source in names]
+        candidates = select_new_jobs(filter_jobs_for_user(deferred, settings), user_id, remaining[0], clusters)
+        remaining[0] -= len(candidates)
+        for job in candidates:
+            await job_queue.put(job)
+
+        # Sources are scraped concurrently, jobs are queued as soon as their page is parsed
+        await asyncio.gather(*(produce_source(job_queue, source_id) for source_id in dict.fromkeys(settings["sources"])))
+
+    with tracer.trace(f"search {user_id}"):
+        await run_user_pipeline(user_id, produce)
+
+# Scheduler for the background searches, users with matching intervals share a tick
+search_scheduler = SearchScheduler(
+    run_search,
+    lambda user_id: user_settings[user_id]["notification_interval"] * 60,
+    jitter=SEARCH_JITTER
+)
+
+# Handler for text messages
+@dp.message()
+async def process_message(message: Message) -> None:
+    """Text message handler"""
+    user_id = message.from_user.id                                              # Get user ID
+
+    if user_id not in ALLOWED_USERS:                                            # Check if user is allowed
+        return
+
+    text = message.text                                                         # Get the message text
+
+    # Check if the message is a search query
+    if re.match(r'^поиск\s+.+', text, re.IGNORECASE):
+        query = text.split(None, 1)[1]                              # Extract the search query
+
+        await message.answer(f"Searched query: {query}")                        # Send a message with the search query
+
+        # Imitate a delay
+        await asyncio.sleep(2)
+
+        # Use LangChain to extract skills
+        try:
+            skills = await model_client.run(
+                await skills_chain.aget(),                                      # Run the skills extraction chain
+                estimate_tokens(skills_template.format(query=query)) + MODEL_OUTPUT_TOKENS,
+                query=query                                                     # Set the query
+            )
+
+            await message.answer(
+                f"Suggested skills: {', '.join(skills)}\n"
+                f"Use the /skills command to set the skills"
+            )
+        except Exception as e:
+            logger.error(f"Error getting skills from AI: {e}")
+            await message.answer("Sorry, I couldn't extract skills from the query")
+
+# Asynchronous function for creating the heavy components while the bot already answers
+async def warm_up() -> None:
+    """Create the model chains and a first browser in the background"""
+    started = time.monotonic()
+    try:
+        await asyncio.gather(relevance_chain.aget(), batch_relevance_chain.aget(), skills_chain.aget())
+        logger.info(f"Model chains ready after {time.monotonic() - started:.1f}s")
+
+        browser_sources = [s for s in FREELANCE_SOURCES.values() if s.get("fetch_mode", FETCH_MODE) == "browser"]
+        if WORKER_MODE:
+            await scrape_workers.aget()
+        elif browser_sources:
+            pool = await browser_pool.aget()
+            async with pool.lease():                                            # Start one browser, it stays in the pool
+                pass
+            logger.info(f"Browser ready after {time.monotonic() - started:.1f}s")
+    except Exception as e:
+        logger.error(f"Error warming up, components will be created on first use: {e}")
+
+# Asynchronous function for the main bot loop
+async def main() -> None:
+    """Run the bot"""
+    # Restore users and resume their searches after a restart
+    job_store.get().prune(SEEN_RETENTION_DAYS)
+    user_settings.update(job_store.get().load_users())
+    for user_id, settings in user_settings.items():
+        if settings.get("task_running"):
+            search_scheduler.start(user_id)
+    delivery_queue.get().start()
+    metrics_server = None
+    if METRICS_PORT:
+        try:
+            metrics_server = await start_metrics_server(REGISTRY, tracer, METRICS_HOST, METRICS_PORT)
+        except OSError as e:                                                    # A busy port must not stop the bot
+            logger.error(f"Metrics server not started on {METRICS_HOST}:{METRICS_PORT}: {e}")
+    warm_up_task = asyncio.create_task(warm_up())
+
+    try:
+        # Asynchronous bot start
+        await dp.start_polling(bot.get())
+    finally:
+        # Stop the searches, quit the pooled browsers and close HTTP connections
+        warm_up_task.cancel()
+        await search_scheduler.stop_all()
+        await source_job_cache.close()
+        await delivery_queue.get().stop()
+        if browser_pool.created:
+            browser_pool.get().close()
+        if scrape_workers.created:
+            scrape_workers.get().close()
+        await http_fetcher.close()
+        if job_store.created:
+            job_store.get().close()
+        if relevance_cache.created:
+            relevance_cache.get().close()
+        if metrics_server:
+            await metrics_server.cleanup()
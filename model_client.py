@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import sys
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from metrics import REGISTRY
+from rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+MODEL_CALLS = REGISTRY.counter("model_calls_total", "Model calls by result", ["result"])
+MODEL_CALL_SECONDS = REGISTRY.histogram("model_call_seconds", "Latency of successful model calls")
+MODEL_TOKENS = REGISTRY.counter("model_tokens_total", "Estimated prompt and answer tokens of model calls")
+
+# Errors of the provider SDK worth retrying after a pause, looked up by name
+PROVIDER_RETRYABLE_ERRORS = ("RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError")
+
+
+def percentile(values, fraction: float) -> float:
+    """Value below which the given fraction of values fall"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def is_retryable(error: Exception) -> bool:
+    """Check if a failed model call may succeed after a pause"""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    openai = sys.modules.get("openai")                                          # Loaded with the model, not at import
+    if openai is None:
+        return False
+    return isinstance(error, tuple(getattr(openai, name) for name in PROVIDER_RETRYABLE_ERRORS))
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Delay requested by the provider in a Retry-After header, if any"""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class ModelClient:
+    """Async model calls with a concurrency cap, request/token buckets and adaptive backoff"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        timeout: float = 120,
+        max_retries: int = 4,
+        min_backoff: float = 2,
+        max_backoff: float = 120,
+    ) -> None:
+        self._semaphore = asyncio.Semaphore(max_concurrency)                    # Calls in flight at once
+        self._requests = RateLimiter(requests_per_minute)                       # Requests per minute
+        self._tokens = RateLimiter(tokens_per_minute, burst=tokens_per_minute)  # Tokens per minute
+        self._timeout = timeout                                                 # Seconds before a call is abandoned
+        self._max_retries = max_retries
+        self._min_backoff = min_backoff
+        self._max_backoff = max_backoff
+        self._backoff = 0.0                                                     # Current pause after errors, adapts
+        self._paused_until = 0.0                                                # Shared pause for all calls
+        self._latencies: deque = deque(maxlen=500)                              # Recent call latencies in seconds
+        self.waiting = 0                                                        # Calls queued for a slot
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def _wait_for_pause(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _slow_down(self, error: Exception) -> float:
+        """Grow the shared pause after a rate limit or timeout"""
+        self._backoff = min(self._max_backoff, max(self._min_backoff, self._backoff * 2))
+        delay = max(self._backoff, retry_after(error) or 0)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def _speed_up(self) -> None:
+        """Shrink the shared pause after a successful call"""
+        self._backoff = self._backoff / 2 if self._backoff >= self._min_backoff else 0.0
+
+    async def run(self, chain: Any, estimated_tokens: int, **inputs: Any) -> str:
+        """Run a chain with the given inputs and return its text output"""
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()                                     # Wait for a free slot
+        finally:
+            self.waiting -= 1
+
+        try:
+            attempt = 0
+            while True:
+                await self._wait_for_pause()
+                await self._requests.acquire()
+                await self._tokens.acquire(estimated_tokens)
+
+                started = time.monotonic()
+                self.calls += 1
+                try:
+                    result = await asyncio.wait_for(chain.ainvoke(inputs), self._timeout)
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    if attempt >= self._max_retries:
+                        self.failures += 1
+                        MODEL_CALLS.inc(result="failed")
+                        raise
+                    attempt += 1
+                    self.retries += 1
+                    MODEL_CALLS.inc(result="retried")
+                    delay = self._slow_down(e)
+                    logger.warning(f"Model call failed ({type(e).__name__}), retrying in {delay:.0f}s")
+                    continue
+
+                latency = time.monotonic() - started
+                self._latencies.append(latency)
+                MODEL_CALLS.inc(result="ok")
+                MODEL_CALL_SECONDS.observe(latency)
+                MODEL_TOKENS.inc(estimated_tokens)
+                self._speed_up()
+                return result["text"] if isinstance(result, dict) else str(result)
+        finally:
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth, latency percentiles and error counts"""
+        return {
+            "queue_depth": self.waiting,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "backoff": self._backoff,
+            "latency_p50": percentile(self._latencies, 0.5),
+            "latency_p95": percentile(self._latencies, 0.95),
+        }
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a queue
+DONE = object()
+
+
+async def take_batch(
+    queue: asyncio.Queue,
+    max_items: int,
+    token_budget: int,
+    tokens_of: Callable[[Any], int],
+) -> Optional[List[Any]]:
+    """Wait for one item, then add whatever else is ready within the limits; None at the end"""
+    item = await queue.get()
+    if item is DONE:
+        queue.put_nowait(DONE)                                                  # Let the other workers see it too
+        return None
+
+    batch, tokens = [item], tokens_of(item)
+    while len(batch) < max_items and not queue.empty():
+        item = queue.get_nowait()
+        if item is DONE:
+            queue.put_nowait(DONE)
+            break
+        batch.append(item)
+        tokens += tokens_of(item)
+        if tokens >= token_budget:
+            break
+    return batch
+
+
+async def run_pipeline(
+    produce: Callable[[asyncio.Queue], Awaitable[None]],
+    score: Callable[[List[Any]], AsyncIterator[Any]],
+    deliver: Callable[[Any], Awaitable[None]],
+    queue_size: int,
+    workers: int,
+    batch_size: int,
+    token_budget: int,
+    tokens_of: Callable[[Any], int],
+) -> None:
+    """Run producer -> scoring workers -> sender stages connected by bounded queues"""
+    job_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)               # Full queues make the stage before wait
+    result_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def producer() -> None:
+        try:
+            await produce(job_queue)
+        finally:
+            await job_queue.put(DONE)
+
+    async def worker() -> None:
+        while True:
+            batch = await take_batch(job_queue, batch_size, token_budget, tokens_of)
+            if batch is None:
+                return
+            async for result in score(batch):
+                await result_queue.put(result)
+
+    async def sender() -> None:
+        while True:
+            result = await result_queue.get()
+            if result is DONE:
+                return
+            try:
+                await deliver(result)
+            except Exception as e:
+                logger.error(f"Error delivering result: {e}")
+
+    sender_task = asyncio.create_task(sender())
+    stage_tasks = [asyncio.create_task(producer())] + [asyncio.create_task(worker()) for _ in range(workers)]
+    try:
+        await asyncio.gather(*stage_tasks)
+        await result_queue.put(DONE)
+        await sender_task
+    finally:
+        # Stop every stage if one failed or the pipeline was cancelled
+        for task in stage_tasks + [sender_task]:
+            task.cancel()
+        await asyncio.gather(*stage_tasks, sender_task, return_exceptions=True)
@@ -0,0 +1,72 @@
+import math
+import re
+from collections import Counter
+from typing import Iterable, List, Mapping, Set, Tuple
+
+from job import Job
+
+# Words, keeping names like c++, c# and .net in one piece
+TOKEN_PATTERN = re.compile(r"[\w+#.]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a text"""
+    tokens = (token.strip(".") for token in TOKEN_PATTERN.findall(text.lower()))
+    return [token for token in tokens if token]
+
+
+def expand_skills(skills: Iterable[str], synonyms: Mapping[str, Iterable[str]]) -> Set[str]:
+    """Query terms of the skills, including their synonyms"""
+    terms = set()
+    for skill in skills:
+        key = " ".join(skill.lower().split())
+        terms.update(tokenize(skill))
+        for synonym in synonyms.get(key, ()):
+            terms.update(tokenize(synonym))
+    return terms
+
+
+def prescore_jobs(
+    jobs: List[Job],
+    skills: Iterable[str],
+    synonyms: Mapping[str, Iterable[str]],
+    title_weight: int = 2,
+    k1: float = 1.5,
+    b: float = 0.75,
+) -> List[float]:
+    """BM25 score of every job against the skills, computed over the whole batch"""
+    terms = expand_skills(skills, synonyms)
+    if not jobs or not terms:
+        return [0.0] * len(jobs)
+
+    # Title words count more than description words
+    documents = [Counter(tokenize(job.title) * title_weight + tokenize(job.description)) for job in jobs]
+    lengths = [sum(document.values()) for document in documents]
+    average_length = sum(lengths) / len(lengths) or 1
+
+    # Inverse document frequency of the query terms in this batch
+    idf = {}
+    for term in terms:
+        frequency = sum(1 for document in documents if term in document)
+        idf[term] = math.log(1 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+
+    scores = []
+    for document, length in zip(documents, lengths):
+        score = 0.0
+        for term in terms:
+            count = document.get(term, 0)
+            if count:
+                score += idf[term] * count * (k1 + 1) / (count + k1 * (1 - b + b * length / average_length))
+        scores.append(score)
+    return scores
+
+
+def select_candidates(
+    jobs: List[Job],
+    scores: List[float],
+    threshold: float,
+    max_candidates: int,
+) -> List[Tuple[Job, float]]:
+    """Best jobs scoring above the threshold, best first"""
+    ranked = sorted(zip(jobs, scores), key=lambda item: item[1], reverse=True)
+    return [(job, score) for job, score in ranked if score > threshold][:max_candidates]
@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Token bucket limiting how much may be used per minute (requests or model tokens)"""
+
+    def __init__(self, per_minute: float, burst: float = 1) -> None:
+        self._rate = per_minute / 60                                            # Tokens added per second
+        self._capacity = burst                                                  # Tokens that can be used at once
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()                                             # Waiters are served in order
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Wait until amount tokens are available and take them"""
+        amount = min(amount, self._capacity)                                    # A large request waits for a full bucket
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                await asyncio.sleep((amount - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= amount
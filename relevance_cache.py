@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOOKUPS = REGISTRY.counter("relevance_cache_lookups_total", "Relevance cache lookups by result", ["result"])
+
+
+def normalize_skills(skills: Iterable[str]) -> str:
+    """Skills in a canonical form, so that order and case don't matter"""
+    return ",".join(sorted({" ".join(skill.lower().split()) for skill in skills if skill.strip()}))
+
+
+def relevance_key(title: str, description: str, price: str, skills: Iterable[str], prompt_version: int) -> str:
+    """Cache key of a relevance evaluation"""
+    payload = json.dumps([title, description, price, normalize_skills(skills), prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RelevanceCache:
+    """LRU cache of relevance scores with a TTL and an optional SQLite backend"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 7 * 86400, path: Optional[str] = None) -> None:
+        self._max_size = max_size                                               # Entries kept in memory
+        self._ttl = ttl                                                         # Seconds an entry stays valid
+        self._entries: "OrderedDict[str, Tuple[float, int, str]]" = OrderedDict()   # Key -> (created at, score, reason)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS relevance_cache "
+                "(cache_key TEXT PRIMARY KEY, score INTEGER NOT NULL, reason TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM relevance_cache WHERE created_at < ?", (time.time() - ttl,))
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[int, str]]:
+        """Cached (score, reason) for a key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT created_at, score, reason FROM relevance_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = tuple(row)
+                    self._store(key, entry)                                     # Promote to memory
+
+            if entry is None or now - entry[0] >= self._ttl:
+                if entry is not None:
+                    self._entries.pop(key, None)                                # Expired
+                self.misses += 1
+                CACHE_LOOKUPS.inc(result="miss")
+                return None
+
+            self._entries.move_to_end(key)                                      # Most recently used
+            self.hits += 1
+            CACHE_LOOKUPS.inc(result="hit")
+            return entry[1], entry[2]
+
+    def set(self, key: str, score: int, reason: str) -> None:
+        """Store the result of an evaluation"""
+        entry = (time.time(), score, reason)
+        with self._lock:
+            self._store(key, entry)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO relevance_cache (cache_key, score, reason, created_at) VALUES (?, ?, ?, ?)",
+                        (key, score, reason, entry[0]),
+                    )
+
+    def _store(self, key: str, entry: Tuple[float, int, str]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)                                   # Evict the least recently used
+
+    def stats(self) -> Dict[str, float]:
+        """Hit and miss counts of the cache"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+        }
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
@@ -0,0 +1,13 @@
+# Entry point of the bot. Worker processes are started with spawn and import this file again,
+# so everything stays under the guard and they load only the scraping modules.
+if __name__ == "__main__":
+    import asyncio
+    import logging
+
+    from main import main
+
+    try:
+        # Run the main function
+        asyncio.run(main())
+    except (KeyboardInterrupt, SystemExit):
+        logging.getLogger("main").info("Bot stopped")
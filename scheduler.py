@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SearchScheduler:
+    """Runs each user's search as a background task on their interval"""
+
+    def __init__(
+        self,
+        search: Callable[[int], Awaitable[None]],
+        get_interval: Callable[[int], float],
+        jitter: float = 30.0,
+    ) -> None:
+        self._search = search                                                   # Runs one search pass for a user
+        self._get_interval = get_interval                                       # Interval of a user in seconds
+        self._jitter = jitter                                                   # Maximum delay added to a tick in seconds
+        self._tasks: Dict[int, asyncio.Task] = {}                               # User ID -> search task
+
+    def is_running(self, user_id: int) -> bool:
+        """Check if a user has a scheduled search"""
+        task = self._tasks.get(user_id)
+        return task is not None and not task.done()
+
+    def next_tick(self, interval: float, now: float) -> float:
+        """Time of the next tick, aligned so that users with matching intervals share it"""
+        tick = (now // interval + 1) * interval                                 # Next multiple of the interval since the epoch
+        return tick + random.Random(tick).uniform(0, self._jitter)              # Same jitter for every user of the tick
+
+    def start(self, user_id: int) -> bool:
+        """Start the search task of a user, returns False if it is already running"""
+        if self.is_running(user_id):
+            return False
+        self._tasks[user_id] = asyncio.create_task(self._run(user_id), name=f"search-{user_id}")
+        return True
+
+    def stop(self, user_id: int) -> bool:
+        """Cancel the search task of a user, returns False if it was not running"""
+        task = self._tasks.pop(user_id, None)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def stop_all(self) -> None:
+        """Cancel all search tasks and wait for them to finish"""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, user_id: int) -> None:
+        try:
+            while True:
+                started = time.time()
+                try:
+                    await self._search(user_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error in search for user {user_id}: {e}")
+
+                # Ticks missed while the search was running are skipped
+                interval = self._get_interval(user_id)
+                now = time.time()
+                if now - started > interval:
+                    logger.warning(f"Search for user {user_id} took {now - started:.0f}s, longer than its interval, skipping a tick")
+                await asyncio.sleep(self.next_tick(interval, now) - now)
+        except asyncio.CancelledError:
+            logger.info(f"Search for user {user_id} stopped")
+            raise
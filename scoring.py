@@ -0,0 +1,113 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from job import Job, clean_text
+
+logger = logging.getLogger(__name__)
+
+# Line format accepted when the model does not return valid JSON
+LINE_PATTERN = re.compile(r'^\W*(\d+)\W+Relevance\W+(\d+)\W+Reason\W+(.+)$', re.IGNORECASE)
+# End of a sentence, where descriptions are split to drop repeated sentences
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, about 4 characters per token"""
+    return len(text) // 4 + 1
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Text cut at a word boundary to about max_tokens tokens"""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars].rstrip(" ,;:-") + "…"
+
+
+def clean_description(text: str) -> str:
+    """Description with collapsed whitespace and without repeated sentences"""
+    sentences = []
+    seen = set()
+    for sentence in SENTENCE_END.split(clean_text(text)):
+        folded = sentence.casefold()
+        if folded not in seen:
+            seen.add(folded)
+            sentences.append(sentence)
+    return " ".join(sentences)
+
+
+def prompt_fields(job: Job, field_budget: Optional[Dict[str, int]] = None) -> Dict[str, str]:
+    """Title, description and price of a job as sent to the model, each trimmed to its token budget"""
+    fields = {"title": job.title, "description": clean_description(job.description), "price": job.price}
+    if field_budget:
+        for name, max_tokens in field_budget.items():
+            if name in fields:
+                fields[name] = trim_to_tokens(fields[name], max_tokens)
+    return fields
+
+
+def job_prompt_tokens(job: Job, field_budget: Optional[Dict[str, int]] = None) -> int:
+    """Rough token count of a job inside a prompt"""
+    return sum(estimate_tokens(text) for text in prompt_fields(job, field_budget).values()) + 10
+
+
+def build_batches(jobs: List[Job], max_jobs: int, token_budget: int, field_budget: Optional[Dict[str, int]] = None) -> List[List[Job]]:
+    """Split jobs into batches of at most max_jobs jobs and token_budget tokens"""
+    batches = []
+    batch: List[Job] = []
+    batch_tokens = 0
+    for job in jobs:
+        tokens = job_prompt_tokens(job, field_budget)
+        if batch and (len(batch) >= max_jobs or batch_tokens + tokens > token_budget):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(job)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def format_batch(jobs: List[Job], field_budget: Optional[Dict[str, int]] = None) -> str:
+    """Numbered job list for the batch relevance prompt"""
+    parts = []
+    for number, job in enumerate(jobs, 1):
+        fields = prompt_fields(job, field_budget)
+        parts.append(f"[{number}]\nTitle: {fields['title']}\nDescription: {fields['description']}\nBudget: {fields['price']}")
+    return "\n\n".join(parts)
+
+
+def _clamp_score(value: Any) -> int:
+    return max(0, min(10, int(round(float(value)))))
+
+
+def parse_batch_response(response: str, count: int) -> Dict[int, Tuple[int, str]]:
+    """Map job numbers 1..count to (score, reason), leaving out entries that failed to parse"""
+    results: Dict[int, Tuple[int, str]] = {}
+
+    # JSON array, possibly wrapped in a code block or extra text
+    start, end = response.find("["), response.rfind("]")
+    if start != -1 and end > start:
+        try:
+            entries = json.loads(response[start:end + 1])
+        except ValueError:
+            entries = []
+        for entry in entries if isinstance(entries, list) else []:
+            try:
+                number = int(entry["id"])
+                if 1 <= number <= count:
+                    results[number] = (_clamp_score(entry["relevance"]), str(entry.get("reason", "No reason")).strip())
+            except (KeyError, TypeError, ValueError):
+                logger.warning(f"Skipping malformed batch entry: {entry}")
+        if results:
+            return results
+
+    # One "<id>: Relevance: <score> Reason: <text>" line per job
+    for line in response.splitlines():
+        match = LINE_PATTERN.match(line.strip())
+        if match and 1 <= int(match.group(1)) <= count:
+            results[int(match.group(1))] = (_clamp_score(match.group(2)), match.group(3).strip())
+    return results
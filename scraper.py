@@ -0,0 +1,88 @@
+import logging
+from typing import Dict, List
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from extraction import NO_DATE, NO_DESCRIPTION, NO_PRICE, NO_TITLE, build_job, extract_jobs, get_page_url
+from job import Job
+
+logger = logging.getLogger(__name__)
+
+
+def scrape_page(
+    driver,
+    source_info: Dict[str, str],
+    page: int,
+    min_price: int,
+    timeout: int,
+    extract_mode: str = "snapshot",
+) -> List[Job]:
+    """Parse jobs from a single page of a source"""
+    jobs = []
+
+    # URL for the current page
+    page_url = get_page_url(source_info, page)
+    driver.set_page_load_timeout(timeout)                                       # Bounds the load too, not only the wait
+    driver.get(page_url)
+
+    # Wait for the job elements to load on the page
+    wait = WebDriverWait(driver, timeout)
+    try:
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, source_info["selector"])))
+    except TimeoutException:
+        # The page loaded without job cards, e.g. past the last page of the listing
+        logger.info(f"No job elements on page {page}")
+        return jobs
+
+    # Parse a single snapshot of the page in-process
+    if source_info.get("extract_mode", extract_mode) == "snapshot":
+        return extract_jobs(driver.page_source, page_url, source_info, page, min_price)
+
+    # Find job elements on the page
+    job_elements = driver.find_elements(By.CSS_SELECTOR, source_info["selector"])
+    logger.info(f"Found {len(job_elements)} job elements on page {page}")
+
+    for element in job_elements:
+        try:
+            # Data extraction
+            try:
+                # Title and URL, if available
+                title_element = element.find_element(By.CSS_SELECTOR, source_info["title_selector"])
+                title = title_element.text
+                url = title_element.get_attribute("href")
+            except NoSuchElementException:
+                title = NO_TITLE
+                url = ""
+
+            try:
+                # Description, if available
+                description_element = element.find_element(By.CSS_SELECTOR, source_info["description_selector"])
+                description = description_element.text
+            except NoSuchElementException:
+                description = NO_DESCRIPTION
+
+            try:
+                # Price, if available
+                price_element = element.find_element(By.CSS_SELECTOR, source_info["price_selector"])
+                price_text = price_element.text
+            except NoSuchElementException:
+                price_text = NO_PRICE
+
+            try:
+                # Date, if available
+                date_element = element.find_element(By.CSS_SELECTOR, source_info["date_selector"])
+                date_text = date_element.text
+            except NoSuchElementException:
+                date_text = NO_DATE
+
+            # Create a job record, skipping jobs below the minimum price
+            job = build_job(source_info, page, title, url, description, price_text, date_text, min_price)
+            if job is not None:
+                jobs.append(job)
+        except Exception as e:
+            logger.error(f"Error parsing job element: {e}")
+
+    return jobs
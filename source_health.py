@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict
+
+import aiohttp
+
+from metrics import REGISTRY
+from model_client import percentile
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_OPENED = REGISTRY.counter("source_circuit_opened_total", "Times a failing source was paused", ["source"])
+
+# Errors worth retrying a page for
+TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    TimeoutError,
+    ConnectionError,
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+)
+
+
+def is_transient(error: Exception) -> bool:
+    """Check if loading a page again may succeed"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    selenium_errors = sys.modules.get("selenium.common.exceptions")           # Only loaded in browser mode
+    if selenium_errors is None or isinstance(error, selenium_errors.InvalidSelectorException):   # Config errors fail again
+        return False
+    return isinstance(error, selenium_errors.WebDriverException)
+
+
+@dataclass
+class SourceHealth:
+    """Recent page latencies and failures of one source"""
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=50))  # Seconds per page attempt
+    consecutive_failures: int = 0                                               # Failed scrapes in a row
+    trips: int = 0                                                              # Circuit openings in a row
+    open_until: float = 0.0                                                     # Source skipped until then
+
+
+class SourceHealthTracker:
+    """Per-source adaptive timeouts and a circuit breaker for failing sources"""
+
+    def __init__(
+        self,
+        default_timeout: float = 20,
+        min_timeout: float = 5,
+        max_timeout: float = 60,
+        timeout_factor: float = 2.0,
+        min_samples: int = 5,
+        failure_threshold: int = 3,
+        cool_down: float = 900,
+        max_cool_down: float = 6 * 3600,
+    ) -> None:
+        self._default_timeout = default_timeout                                 # Timeout until enough pages are measured
+        self._min_timeout = min_timeout
+        self._max_timeout = max_timeout
+        self._timeout_factor = timeout_factor                                   # Timeout as a multiple of p95 latency
+        self._min_samples = min_samples
+        self._failure_threshold = failure_threshold                             # Failed scrapes that open the circuit
+        self._cool_down = cool_down                                             # First pause, doubled on every new trip
+        self._max_cool_down = max_cool_down
+        self._sources: Dict[str, SourceHealth] = {}
+
+    def _health(self, source: str) -> SourceHealth:
+        return self._sources.setdefault(source, SourceHealth())
+
+    def timeout(self, source: str) -> float:
+        """Page wait timeout derived from the p95 latency of the source"""
+        latencies = self._health(source).latencies
+        if len(latencies) < self._min_samples:
+            return self._default_timeout
+        p95 = percentile(latencies, 0.95)
+        return max(self._min_timeout, min(self._max_timeout, p95 * self._timeout_factor))
+
+    def allow(self, source: str) -> bool:
+        """Check if the source may be scraped, false while its circuit is open"""
+        return time.monotonic() >= self._health(source).open_until
+
+    def retry_in(self, source: str) -> float:
+        """Seconds until an open circuit lets the source be tried again"""
+        return max(0.0, self._health(source).open_until - time.monotonic())
+
+    def record_latency(self, source: str, seconds: float) -> None:
+        """Remember how long a page attempt took, failed attempts included"""
+        self._health(source).latencies.append(seconds)
+
+    def record_success(self, source: str) -> None:
+        """Close the circuit after a successful scrape"""
+        health = self._health(source)
+        if health.trips:
+            logger.info(f"{source} recovered")
+        health.consecutive_failures = 0
+        health.trips = 0
+
+    def record_failure(self, source: str) -> None:
+        """Count a failed scrape, opening the circuit after too many in a row"""
+        health = self._health(source)
+        health.consecutive_failures += 1
+        if health.consecutive_failures < self._failure_threshold:
+            return
+
+        # A failed trial after a cool-down opens the circuit for longer
+        cool_down = min(self._max_cool_down, self._cool_down * 2 ** health.trips)
+        health.trips += 1
+        health.open_until = time.monotonic() + cool_down
+        CIRCUIT_OPENED.inc(source=source)
+        logger.warning(f"{source} failed {health.consecutive_failures} times in a row, skipping it for {cool_down:.0f}s")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Timeout, failures and remaining cool-down of every source"""
+        return {
+            source: {
+                "timeout": self.timeout(source),
+                "p95": percentile(health.latencies, 0.95),
+                "consecutive_failures": health.consecutive_failures,
+                "retry_in": self.retry_in(source),
+            }
+            for source, health in self._sources.items()
+        }
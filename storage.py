@@ -0,0 +1,116 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Set
+
+from job import Job
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    settings TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    url TEXT NOT NULL,
+    data TEXT NOT NULL,
+    first_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen (
+    user_id INTEGER NOT NULL,
+    job_key TEXT NOT NULL,
+    notified INTEGER NOT NULL DEFAULT 0,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (user_id, job_key)
+);
+"""
+
+# Settings that only make sense while the process is running
+TRANSIENT_SETTINGS = {"last_jobs"}
+
+
+class JobStore:
+    """SQLite store for user settings, scraped jobs and the per-user seen index"""
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()                                           # The connection is shared by threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")                           # Readers don't block the writer
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def load_users(self) -> Dict[int, Dict[str, Any]]:
+        """Load all user settings together with their seen jobs"""
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, settings FROM users").fetchall()
+        users = {}
+        for user_id, settings in rows:
+            users[user_id] = json.loads(settings)
+            users[user_id]["last_jobs"] = self.seen_keys(user_id)
+        return users
+
+    def save_user(self, user_id: int, settings: Dict[str, Any]) -> None:
+        """Save the settings of a user"""
+        data = json.dumps({k: v for k, v in settings.items() if k not in TRANSIENT_SETTINGS}, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO users (user_id, settings) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET settings = excluded.settings",
+                (user_id, data),
+            )
+
+    def save_jobs(self, jobs: Iterable[Job]) -> None:
+        """Store scraped jobs, keeping the first copy of each"""
+        now = time.time()
+        rows = [(job.key, job.source, job.url, json.dumps(job.to_dict(), ensure_ascii=False), now) for job in jobs]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (job_key, source, url, data, first_seen) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def known_keys(self, keys: Iterable[str]) -> Set[str]:
+        """Keys among the given ones of jobs that were scraped before"""
+        keys = list(keys)
+        known = set()
+        with self._lock:
+            for start in range(0, len(keys), 500):                              # Stay below the SQLite variable limit
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT job_key FROM jobs WHERE job_key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                known.update(row[0] for row in rows)
+        return known
+
+    def seen_keys(self, user_id: int) -> Set[str]:
+        """Keys of all jobs already analyzed for a user"""
+        with self._lock:
+            rows = self._conn.execute("SELECT job_key FROM seen WHERE user_id = ?", (user_id,)).fetchall()
+        return {row[0] for row in rows}
+
+    def mark_seen(self, user_id: int, job_key: str, notified: bool = False) -> None:
+        """Record that a job was analyzed, and possibly delivered, for a user"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO seen (user_id, job_key, notified, seen_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(user_id, job_key) DO UPDATE SET notified = MAX(notified, excluded.notified)",
+                (user_id, job_key, int(notified), time.time()),
+            )
+
+    def prune(self, max_age_days: float) -> None:
+        """Forget jobs and seen entries older than the retention period"""
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM seen WHERE seen_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM jobs WHERE first_seen < ?", (cutoff,))
+        logger.info(f"Pruned jobs older than {max_age_days} days")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,96 @@
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from browser_pool import BrowserPool, chrome_factory
+from extraction import extract_jobs
+from job import Job
+from scraper import scrape_page
+
+logger = logging.getLogger(__name__)
+
+# Browser of the current worker process, created by init_worker
+_worker_pool: Optional[BrowserPool] = None
+
+
+def init_worker(browser_path: str, max_pages: int, max_memory_mb: int, log_file: Optional[str]) -> None:
+    """Set up a worker process: logging, a private browser and a clean exit"""
+    global _worker_pool
+    logging.basicConfig(
+        format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO,
+        filename=log_file,
+        force=True                                                              # Replace any setup done by imported modules
+    )
+    signal.signal(signal.SIGINT, signal.SIG_IGN)                                # Ctrl+C is handled by the bot process
+    _worker_pool = BrowserPool(chrome_factory(browser_path), size=1, max_pages=max_pages, max_memory_mb=max_memory_mb)
+    atexit.register(_worker_pool.close)                                         # Quit the browser with the process
+
+
+def scrape_page_in_worker(
+    source_info: Dict[str, str],
+    page: int,
+    min_price: int,
+    timeout: int,
+    extract_mode: str,
+) -> List[Job]:
+    """Scrape a page with the browser of this worker process"""
+    with _worker_pool.driver() as driver:
+        return scrape_page(driver, source_info, page, min_price, timeout, extract_mode)
+
+
+class ScrapeWorkers:
+    """Process pool that runs browsers and page parsing outside the bot process"""
+
+    def __init__(
+        self,
+        workers: Optional[int],
+        browser_path: str,
+        max_pages: int = 50,
+        max_memory_mb: int = 1024,
+        log_file: Optional[str] = None,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1                           # One browser per worker process
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),                    # Fresh interpreters, they import run.py and the scraping modules only
+            initializer=init_worker,
+            initargs=(browser_path, max_pages, max_memory_mb, log_file),
+        )
+
+    async def scrape_page(
+        self,
+        source_info: Dict[str, str],
+        page: int,
+        min_price: int,
+        timeout: int,
+        extract_mode: str = "snapshot",
+    ) -> List[Job]:
+        """Scrape a page in a worker process"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, scrape_page_in_worker, source_info, page, min_price, timeout, extract_mode
+        )
+
+    async def extract_jobs(
+        self,
+        page_html: str,
+        page_url: str,
+        source_info: Dict[str, str],
+        page: int,
+        min_price: int,
+    ) -> List[Job]:
+        """Parse fetched HTML in a worker process"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, extract_jobs, page_html, page_url, source_info, page, min_price
+        )
+
+    def close(self) -> None:
+        """Stop the worker processes, dropping pages not started yet"""
+        self._executor.shutdown(wait=True, cancel_futures=True)